@@ -35,4 +35,6 @@ from .version import __version__
 from .clkreset import ClkReset
 from .clkreset import Clk
 from .clkreset import Reset
+from .clkreset import ClockTree
 from .detect_clk import detect_clk
+from .detect_clk import ClockMonitor
@@ -1,7 +1,13 @@
 import logging
+from array import array
+from bisect import bisect_right
+from itertools import compress, repeat
+from operator import itemgetter, ne
 from random import randint     
 from cocotb import start_soon
+from cocotb.queue import Queue, QueueFull
 from cocotb.triggers import RisingEdge
+from cocotb.utils import get_sim_time
 
 from cocotbext.ahb import AHBBus
 from cocotbext.ahb import AHBLiteMaster
@@ -10,31 +16,93 @@ from cocotbext.ahb import AHBMonitor
 
 from typing import Optional, Sequence, Union, List, Any
 import collections.abc
-class AHBMonitorDX(AHBMonitor):
+from .cocotbext_logger import LoggingMixin
+from .latency import LatencyMixin
+from .trace import TraceMixin, READ, WRITE
+from .codec import tobytes, towords, isbuffer
+
+class AHBMonitorDX(TraceMixin, LoggingMixin, AHBMonitor):
     def __init__(
         self, bus: AHBBus, clock: str, reset: str, prefix: str = None, **kwargs: Any
     ) -> None:
         super().__init__(bus, clock, reset, **kwargs)
         self.prefix = prefix
+        self.txn = None
         self.txn_receive = False
+        self._clear_cr = None
         self.enable_log_write = False           
         self.enable_log_read = False           
-        start_soon(self._log_txn())
+        self.trace = None
+        self.subscribers = []
+        self.dropped = 0
+        self.set_regions([])
 
-    async def _log_txn(self):
-        self.log.setLevel(logging.DEBUG)
-        while True:
-            self.txn_receive = False
-            self.txn = await self.wait_for_recv()
-            self.txn_receive = True
-            if self.txn.mode:
-                if self.enable_log_write:
-                    self.log.debug(f'Write {self.prefix} 0x{self.txn.addr:08x} 0x{self.txn.wdata:08x}')
-#                     print(f'Write 0x{self.txn.addr:08x} 0x{self.txn.wdata:08x}')
+    def _recv(self, txn):
+        # publish first, then let the base class deliver txn to callbacks or,
+        # when there are none, to _recvQ so len(mon) and mon[i] keep working
+        self._log_txn(txn)
+        super()._recv(txn)
+
+    def _log_txn(self, txn):
+        # called by the monitor for every transaction, nothing here may block
+        self.txn = txn
+        self.txn_receive = True
+        if self._clear_cr is None:
+            self._clear_cr = start_soon(self._clear_txn())
+        if self.trace is not None:
+            if txn.mode:
+                self.trace.record(WRITE, txn.addr, txn.wdata, 4)
             else:
-                if self.enable_log_read:
-                    self.log.debug(f'Read  {self.prefix} 0x{self.txn.addr:08x} 0x{self.txn.rdata:08x}')
-            await RisingEdge(self.clk)
+                self.trace.record(READ, txn.addr, txn.rdata, 4)
+        if txn.mode:
+            if self.enable_log_write:
+                self.log.debug('Write %s 0x%08x 0x%08x', self.prefix, txn.addr, txn.wdata)
+        else:
+            if self.enable_log_read:
+                self.log.debug('Read  %s 0x%08x 0x%08x', self.prefix, txn.addr, txn.rdata)
+        i = bisect_right(self.region_bases, txn.addr) - 1
+        if i >= 0 and txn.addr < self.region_limits[i]:
+            self.region_counts[2*i + (1 if txn.mode else 0)] += 1
+        else:
+            self.region_other += 1
+        for queue in self.subscribers:
+            try:
+                queue.put_nowait(txn)
+            except QueueFull:
+                self.dropped += 1
+                self.log.warning('Subscriber queue full, %s transaction at 0x%08x dropped', self.prefix, txn.addr)
+
+    async def _clear_txn(self):
+        # txn_receive stays set until the next rising edge, this only runs
+        # while transactions are arriving
+        await RisingEdge(self.clk)
+        self.txn_receive = False
+        self._clear_cr = None
+
+    def subscribe(self, maxsize: int = 1024) -> Queue:
+        """Return a queue that receives every transaction from now on, once
+        maxsize are waiting further ones are dropped and counted in dropped."""
+        queue = Queue(maxsize=maxsize)
+        self.subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: Queue) -> None:
+        self.subscribers.remove(queue)
+
+    def set_regions(self, regions: Sequence[tuple]) -> None:
+        """Count reads and writes per region, regions is a list of (name, base, size)."""
+        self.regions = sorted(regions, key=lambda r: r[1])
+        self.region_bases = [r[1] for r in self.regions]
+        self.region_limits = [r[1]+r[2] for r in self.regions]
+        self.region_counts = array('Q', bytes(8*2*len(self.regions)))
+        self.region_other = 0
+
+    def coverage(self) -> dict:
+        result = {}
+        for i, (name, base, size) in enumerate(self.regions):
+            result[name] = {'read': self.region_counts[2*i], 'write': self.region_counts[2*i+1]}
+        result['other'] = self.region_other
+        return result
 
     def enable_write_logging(self):
         self.log.setLevel(logging.DEBUG)
@@ -43,20 +111,30 @@ class AHBMonitorDX(AHBMonitor):
     def enable_read_logging(self):
         self.log.setLevel(logging.DEBUG)
         self.enable_log_read = True           
-    
 
-class AHBLiteMasterDX(AHBLiteMaster):
+    def disable_logging(self):
+        self.enable_log_write = False
+        self.enable_log_read = False
+
+class AHBLiteMasterDX(LatencyMixin, TraceMixin, LoggingMixin, AHBLiteMaster):
     
     def __init__(
         self,
         bus: AHBBus,
         clock: str,
         reset: str,
+        pip: bool = False,
         **kwargs,
     ):
-        self.pip = False
+        self.pip = pip
         super().__init__(bus, clock, reset, **kwargs)
 
+    def enable_logging(self):
+        self.log.setLevel(logging.DEBUG)
+
+    def disable_logging(self):
+        self.log.setLevel(logging.WARNING)
+
     def check_read(self):
         if not self.returned_val == self.value and not -1 == self.value:
             raise Exception(f"Expected 0x{self.value:08x} doesn't match returned 0x{self.returned_val:08x}")
@@ -66,19 +144,22 @@ class AHBLiteMasterDX(AHBLiteMaster):
         if isinstance(address, collections.abc.Sequence):
             self.addresses = address
         else:
-            self.addresses = []
-            for i in range(length):
-                self.addresses.append(address+(i*4))
+            self.addresses = list(range(address, address+(length*4), 4))
         if isinstance(value, collections.abc.Sequence):
             self.values = value
+        elif -1 == value:
+            self.values = [value] * length
         else:
-            self.values = []
-            for i in range(length):
-                if -1 == value:
-                    self.values.append(value)
-                else:
-                    self.values.append((value>>(i*32)) & 0xffffffff)
+            self.values = towords(tobytes(value, length*4)).tolist()
     
+    def enable_pipeline(self):
+        """Overlap the address phase of each transfer with the data phase of
+        the one before, wait states on HREADY are still honoured."""
+        self.pip = True
+
+    def disable_pipeline(self):
+        self.pip = False
+
     def enable_backpressure(self):
         self.backpressure = True
 
@@ -95,10 +176,19 @@ class AHBLiteMasterDX(AHBLiteMaster):
         **kwargs,
     ) -> Sequence[dict]:
         self.prepare_addresses(address, value, length)
+        kwargs.setdefault('pip', self.pip)
 
+        if self.latency is not None:
+            t0 = get_sim_time('step')
         ret = await super().write(self.addresses, self.values, **kwargs)
-        for i, x in enumerate(ret):
-            self.log.debug(f"Write 0x{self.addresses[i]:08x}: 0x{self.values[i]:08x}")
+        if self.latency is not None:
+            self.latency.record('write', self.addresses[0], t0, count=len(self.addresses))
+        if self.trace is not None:
+            for a, v in zip(self.addresses, self.values):
+                self.trace.record(WRITE, a, v, 4)
+        if self.debug_enabled:
+            for i, x in enumerate(ret):
+                self.log.debug("Write 0x%08x: 0x%08x", self.addresses[i], self.values[i])
         return ret
 
     async def read(
@@ -109,10 +199,52 @@ class AHBLiteMasterDX(AHBLiteMaster):
         **kwargs,
     ) -> Sequence[dict]:
         self.prepare_addresses(address, value, length)
+        kwargs.setdefault('pip', self.pip)
+        if self.latency is not None:
+            t0 = get_sim_time('step')
         ret = await super().read(self.addresses, **kwargs)
+        if self.latency is not None:
+            self.latency.record('read', self.addresses[0], t0, count=len(self.addresses))
         for i, x in enumerate(ret):
             self.returned_val = int(x['data'],16)
             self.value = self.values[i]
-            self.log.debug(f"Read  0x{self.addresses[i]:08x}: 0x{self.returned_val:08x}")
+            if self.trace is not None:
+                self.trace.record(READ, self.addresses[i], self.returned_val, 4)
+            if self.debug_enabled:
+                self.log.debug("Read  0x%08x: 0x%08x", self.addresses[i], self.returned_val)
             self.check_read()
         return ret
+
+    async def write_block(self, address: int, data, **kwargs) -> Sequence[dict]:
+        """Write a buffer, or a sequence of words, to consecutive addresses."""
+        words = towords(data) if isbuffer(data) else array('I', data)
+        return await self.write(list(range(address, address+(len(words)*4), 4)), words.tolist(), **kwargs)
+
+    async def read_block(self, address: int, length: int, **kwargs) -> array:
+        """Read length consecutive words, returned as an array('I')."""
+        addresses = list(range(address, address+(length*4), 4))
+        kwargs.setdefault('pip', self.pip)
+        if self.latency is not None:
+            t0 = get_sim_time('step')
+        ret = await super().read(addresses, **kwargs)
+        if self.latency is not None:
+            self.latency.record('read', address, t0, count=len(addresses))
+        self.block = array('I', map(int, map(itemgetter('data'), ret), repeat(16)))
+        if self.trace is not None:
+            for a, v in zip(addresses, self.block):
+                self.trace.record(READ, a, v, 4)
+        return self.block
+
+    async def verify_block(self, address: int, expected, raise_error: bool = True, **kwargs) -> List[int]:
+        """Read back len(expected) words and return the byte offset of every
+        mismatching word, raising once with all of them if raise_error."""
+        expected = towords(expected) if isbuffer(expected) else array('I', expected)
+        returned = await self.read_block(address, len(expected), **kwargs)
+        if returned == expected:
+            self.mismatches = []
+        else:
+            self.mismatches = [4*i for i in compress(range(len(expected)), map(ne, returned, expected))]
+        if self.mismatches and raise_error:
+            detail = ", ".join(f"0x{address+o:08x}: expected 0x{expected[o//4]:08x} returned 0x{returned[o//4]:08x}" for o in self.mismatches[:8])
+            raise Exception(f"{len(self.mismatches)} of {len(expected)} words mismatched, {detail}")
+        return self.mismatches
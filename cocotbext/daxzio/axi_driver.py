@@ -1,47 +1,34 @@
-import math
+import os
+import mmap
 import logging
 import itertools
-from random import randint, seed
+from random import Random, randint, seed
 from cocotb import start_soon
-from cocotb.triggers import RisingEdge
+from cocotb.triggers import RisingEdge, Event, ClockCycles, Timer, First
+from cocotb.utils import get_sim_time
 from cocotbext.axi import AxiBus, AxiLiteBus
 from cocotbext.axi import AxiMaster, AxiStreamBus, AxiStreamSource, AxiStreamSink, AxiStreamMonitor, AxiStreamFrame
 from cocotbext.axi import AxiSlave, AxiLiteSlave, AxiLiteRam, AxiLiteRamWrite, AxiSlaveWrite, AxiSlaveRead
 from .cocotbext_logger import CocoTBExtLogger
-
-def tobytes(val, length=4):
-    array = []
-    for i in range(length):
-        array.append((val>>(8*i))&0xff)
-    return bytearray(array)
-
-def cycle_pause(seednum=7):
-    seed(seednum)
-    length = randint(0, 0xfff)
-    array = []
-    for i in range(length):
-        x = randint(0, 5)
-        if 0 == x:
-            array.append(1)
-        else:
-            array.append(0)
-    return itertools.cycle(array)
-
-def tointeger(val):
-    result = 0
-    for i, j in enumerate(val):
-        result += int(j) << (8*i)
-    return result
-
-class AxiSinkWrite(CocoTBExtLogger):
+from .pause import cycle_pause
+from .scoreboard import StreamScoreboard
+from .metrics import MetricsMixin, axi_channels, axis_channels
+from .latency import LatencyMixin
+from .trace import TraceMixin, READ, WRITE
+from .codec import tobytes, tointeger, tobuffer, bytelength, isbuffer, chunks, mismatch_ranges, towords
+from .memimage import random_buffer, load_image
+
+class AxiSinkWrite(MetricsMixin, CocoTBExtLogger):
     def __init__(self, dut, axi_prefix="m_axi", clk_name="m_aclk", reset_name=None, seednum=None, target=None):
         CocoTBExtLogger.__init__(self, type(self).__name__)
 #         self.ram = SparseMemoryRegion()
+        self.clk = getattr(dut, clk_name)
+        self.bus = AxiBus.from_prefix(dut, axi_prefix)
+        self.metrics = None
         if reset_name is None:
-            self.axi_slave = AxiSlaveWrite(AxiBus.from_prefix(dut, axi_prefix).write, getattr(dut, clk_name), target=target)
+            self.axi_slave = AxiSlaveWrite(self.bus.write, self.clk, target=target)
         else:
-            self.axi_slave = AxiSlaveWrite(AxiBus.from_prefix(dut, axi_prefix).write, getattr(dut, clk_name), getattr(dut, reset_name))
-        self.enable_logging()
+            self.axi_slave = AxiSlaveWrite(self.bus.write, self.clk, getattr(dut, reset_name))
 #         self.arid = 4
         self.awid = 4
         self.axi_slave.log.setLevel(logging.WARNING)
@@ -54,6 +41,9 @@ class AxiSinkWrite(CocoTBExtLogger):
         #self.axi_slave.log.setLevel(logging.DEBUG)
 #         self.axi_slave.read_if.log.setLevel(logging.WARNING)
 
+    def _metrics_channels(self):
+        return axi_channels(write=self.bus.write)
+
     async def _write(self, address, data):
         self.write(address % self.size, data)
     
@@ -73,6 +63,21 @@ class AxiSinkWrite(CocoTBExtLogger):
         if not self.returned_val == self.data and not None == self.data:
             #raise Exception(f"0x{addr:08x}: Expected 0x{self.data:08x} doesn't match returned 0x{self.returned_val:08x}")
             print(f"0x{addr:08x}: Expected 0x{self.data:08x} doesn't match returned 0x{self.returned_val:08x}")
+
+    async def verify_region(self, addr, expected, raise_error=True):
+        """Read len(expected) bytes from the target in one go and compare them
+        with expected, returns the mismatching (start, end) address ranges."""
+        expected = tobytes(expected, bytelength(expected)) if isinstance(expected, int) else expected
+        length = bytelength(expected)
+        self.returned = await self.axi_slave.target.read(addr, length)
+        ranges = mismatch_ranges(self.returned, expected)
+        self.mismatches = [(addr+start, addr+end) for start, end in ranges]
+        self.mismatch_count = sum(end - start for start, end in ranges)
+        if self.mismatches and raise_error:
+            detail = ", ".join(f"0x{start:08x}-0x{end-1:08x}" for start, end in self.mismatches[:8])
+            more = f" and {len(self.mismatches)-8} more" if len(self.mismatches) > 8 else ""
+            raise Exception(f"{self.mismatch_count} of {length} bytes mismatched in {len(self.mismatches)} ranges, {detail}{more}")
+        return self.mismatches
         
 #     def enable_logging(self):
 #         self.axi_slave.log.setLevel(logging.DEBUG)
@@ -80,43 +85,50 @@ class AxiSinkWrite(CocoTBExtLogger):
 #     def disable_logging(self):
 #         self.axi_slave.log.setLevel(logging.WARNING)
 
-    def enable_write_backpressure(self, seednum=None):
+    def enable_write_backpressure(self, seednum=None, profile='uniform', **kwargs):
         if seednum is not None:
             self.base_seed = seednum
-        self.axi_slave.aw_channel.set_pause_generator(cycle_pause(self.base_seed+1))
-        self.axi_slave.w_channel.set_pause_generator(cycle_pause(self.base_seed+2))
-        self.axi_slave.b_channel.set_pause_generator(cycle_pause(self.base_seed+3))
+        self.axi_slave.aw_channel.set_pause_generator(cycle_pause(self.base_seed+1, profile, **kwargs))
+        self.axi_slave.w_channel.set_pause_generator(cycle_pause(self.base_seed+2, profile, **kwargs))
+        self.axi_slave.b_channel.set_pause_generator(cycle_pause(self.base_seed+3, profile, **kwargs))
     
-    def enable_backpressure(self, seednum=None):
-        self.enable_write_backpressure(seednum)      
+    def enable_backpressure(self, seednum=None, profile='uniform', **kwargs):
+        self.enable_write_backpressure(seednum, profile, **kwargs)      
 
     def disable_backpressure(self):
         self.axi_slave.aw_channel.set_pause_generator(itertools.cycle([0,]))
         self.axi_slave.w_channel.set_pause_generator(itertools.cycle([0,]))
         self.axi_slave.b_channel.set_pause_generator(itertools.cycle([0,]))
         
-class AxiSink(CocoTBExtLogger):
+class AxiSink(MetricsMixin, CocoTBExtLogger):
     def __init__(self, dut, axi_prefix="m_axi", clk_name="m_aclk", reset_name=None, seednum=None):
         CocoTBExtLogger.__init__(self, type(self).__name__)
-        self.enable_logging()
+        self.clk = getattr(dut, clk_name)
+        self.bus = AxiBus.from_prefix(dut, axi_prefix)
+        self.metrics = None
         if reset_name is None:
-            self.axi_slave = AxiSlave(AxiBus.from_prefix(dut, axi_prefix), getattr(dut, clk_name))
+            self.axi_slave = AxiSlave(self.bus, self.clk)
         else:
-            self.axi_slave = AxiSlave(AxiBus.from_prefix(dut, axi_prefix), getattr(dut, clk_name), getattr(dut, reset_name))
+            self.axi_slave = AxiSlave(self.bus, self.clk, getattr(dut, reset_name))
         self.arid = 4
         self.awid = 4
         self.axi_slave.write_if.log.setLevel(logging.WARNING)
         self.axi_slave.read_if.log.setLevel(logging.WARNING)
-        
-class AxiSinkRead(CocoTBExtLogger):
+
+    def _metrics_channels(self):
+        return axi_channels(self.bus.write, self.bus.read)
+
+class AxiSinkRead(MetricsMixin, CocoTBExtLogger):
     def __init__(self, dut, axi_prefix="m_axi", clk_name="m_aclk", reset_name=None, seednum=None, target=None):
         CocoTBExtLogger.__init__(self, type(self).__name__)
 #         self.ram = SparseMemoryRegion()
+        self.clk = getattr(dut, clk_name)
+        self.bus = AxiBus.from_prefix(dut, axi_prefix)
+        self.metrics = None
         if reset_name is None:
-            self.axi_slave = AxiSlaveRead(AxiBus.from_prefix(dut, axi_prefix).read, getattr(dut, clk_name), target=target)
+            self.axi_slave = AxiSlaveRead(self.bus.read, self.clk, target=target)
         else:
-            self.axi_slave = AxiSlaveRead(AxiBus.from_prefix(dut, axi_prefix).read, getattr(dut, clk_name), getattr(dut, reset_name))
-        self.enable_logging()
+            self.axi_slave = AxiSlaveRead(self.bus.read, self.clk, getattr(dut, reset_name))
         self.arid = 4
 #         self.awid = 4
         self.axi_slave.log.setLevel(logging.WARNING)
@@ -125,17 +137,50 @@ class AxiSinkRead(CocoTBExtLogger):
         else:
             self.base_seed = randint(0,0xffffff)
         seed(self.base_seed)
+        self.rng = Random(self.base_seed)
+        self.regions = []
         self.log.debug(f"Seed is set to {self.base_seed}") 
         
         #self.axi_slave.log.setLevel(logging.DEBUG)
 #         self.axi_slave.read_if.log.setLevel(logging.WARNING)
-    async def write_random(self, addr=0, num=16):
-        self.data = []
-        for i in range(num):
-            self.data.append(randint(0, 0xffffffff))
-#             data = randint(0, 0xffffffff) 
-        for i, d in enumerate(self.data):
-            await self.axi_slave.target.write(addr+(i*0x4), d.to_bytes(4, 'little'))
+
+    def _metrics_channels(self):
+        return axi_channels(read=self.bus.read)
+
+    async def prefill(self, addr, data):
+        """Write a whole buffer into the target at once and keep it as the
+        expected contents of that region."""
+        data = tobuffer(data)
+        await self.axi_slave.target.write(addr, data)
+        self.regions.append((addr, data))
+        if self.debug_enabled:
+            self.log.debug("Prefill 0x%08x: %d bytes", addr, len(data))
+        return data
+
+    async def write_random(self, addr=0, num=16, seednum=None):
+        """Fill num random 32 bit words from addr, self.data holds the words."""
+        rng = self.rng if seednum is None else Random(seednum)
+        self.expected = await self.prefill(addr, random_buffer(4*num, rng=rng))
+        self.data = towords(self.expected)
+
+    async def load_image(self, path, addr=0, format=None):
+        """Load a bin, Intel HEX, $readmemh or ELF image, offset by addr,
+        returns the (address, bytes) segments written."""
+        segments = load_image(path, addr, format)
+        for address, data in segments:
+            await self.prefill(address, data)
+        self.log.info(f"Loaded {path}, {len(segments)} segments, {sum(len(d) for a, d in segments)} bytes")
+        return segments
+
+    def expected_data(self, addr, length):
+        """The bytes last prefilled over addr to addr+length, gaps are zero."""
+        buf = bytearray(length)
+        for base, data in self.regions:
+            start = max(addr, base)
+            end = min(addr+length, base+len(data))
+            if start < end:
+                buf[start-addr:end-addr] = data[start-base:end-base]
+        return bytes(buf)
 
 #     async def _write(self, address, data):
 #         self.write(address % self.size, data)
@@ -163,27 +208,24 @@ class AxiSinkRead(CocoTBExtLogger):
 # #     def disable_logging(self):
 # #         self.axi_slave.log.setLevel(logging.WARNING)
 
-    def enable_write_backpressure(self, seednum=None):
+    def enable_read_backpressure(self, seednum=None, profile='uniform', **kwargs):
         if seednum is not None:
             self.base_seed = seednum
-        self.axi_slave.aw_channel.set_pause_generator(cycle_pause(self.base_seed+1))
-        self.axi_slave.w_channel.set_pause_generator(cycle_pause(self.base_seed+2))
-        self.axi_slave.b_channel.set_pause_generator(cycle_pause(self.base_seed+3))
+        self.axi_slave.r_channel.set_pause_generator(cycle_pause(self.base_seed+4, profile, **kwargs))
+        self.axi_slave.ar_channel.set_pause_generator(cycle_pause(self.base_seed+5, profile, **kwargs))
     
-    def enable_backpressure(self, seednum=None):
-        self.enable_write_backpressure(seednum)      
+    def enable_backpressure(self, seednum=None, profile='uniform', **kwargs):
+        self.enable_read_backpressure(seednum, profile, **kwargs)      
 
     def disable_backpressure(self):
-        self.axi_slave.aw_channel.set_pause_generator(itertools.cycle([0,]))
-        self.axi_slave.w_channel.set_pause_generator(itertools.cycle([0,]))
-        self.axi_slave.b_channel.set_pause_generator(itertools.cycle([0,]))
+        self.axi_slave.r_channel.set_pause_generator(itertools.cycle([0,]))
+        self.axi_slave.ar_channel.set_pause_generator(itertools.cycle([0,]))
     
 
 
 class AxiLiteSink(CocoTBExtLogger):
     def __init__(self, dut, axi_prefix="m_axi", clk_name="m_aclk", reset_name=None, seednum=None):
         CocoTBExtLogger.__init__(self, type(self).__name__)
-        self.enable_logging()
         if reset_name is None:
             self.axi_slave = AxiLiteSlave(AxiLiteBus.from_prefix(dut, axi_prefix), getattr(dut, clk_name))
         else:
@@ -201,16 +243,21 @@ class AxiLiteSink(CocoTBExtLogger):
 #         self.log.debug(f"Seed is set to {self.base_seed}")
 
     
-class AxiDriver:
+class AxiDriver(MetricsMixin, LatencyMixin, TraceMixin, CocoTBExtLogger):
     def __init__(self, dut, axi_prefix="s_axi", clk_name="s_aclk", reset_name=None, seednum=None):
-        self.log = logging.getLogger(f"cocotb.AxiDriver")
-        self.enable_logging()
+        CocoTBExtLogger.__init__(self, type(self).__name__, enable=False)
+        self.clk = getattr(dut, clk_name)
+        self.bus = AxiBus.from_prefix(dut, axi_prefix)
+        self.metrics = None
+        self.latency = None
+        self.trace = None
         if reset_name is None:
-            self.axi_master = AxiMaster(AxiBus.from_prefix(dut, axi_prefix), getattr(dut, clk_name))
+            self.axi_master = AxiMaster(self.bus, self.clk)
         else:
-            self.axi_master = AxiMaster(AxiBus.from_prefix(dut, axi_prefix), getattr(dut, clk_name), getattr(dut, reset_name))
+            self.axi_master = AxiMaster(self.bus, self.clk, getattr(dut, reset_name))
         self.arid = 4
         self.awid = 4
+        self.poll_reads = 0
         self.axi_master.write_if.log.setLevel(logging.WARNING)
         self.axi_master.read_if.log.setLevel(logging.WARNING)
         if seednum is not None:
@@ -226,15 +273,26 @@ class AxiDriver:
 #             self._process_write_cr = start_soon(self._process_read())
         
     
+    def _metrics_channels(self):
+        return axi_channels(self.bus.write, self.bus.read)
+
     @property
     def length(self):
         if self.len is None:
-            if not 0 == self.data and not self.data is None:
-                return max(math.ceil(math.log2(self.data)/32)*4, 4)
+            if self.data is not None:
+                return bytelength(self.data, 4)
             else:
                 return 4
         return self.len
 
+    @property
+    def returned_bytes(self):
+        if hasattr(self.read_op, "data"):
+            if hasattr(self.read_op.data, "data"):
+                return self.read_op.data.data
+            return self.read_op.data
+        return self.read_op
+
     @property
     def returned_val(self):
         if hasattr(self.read_op, "data"):
@@ -245,28 +303,22 @@ class AxiDriver:
         else:
             return int.from_bytes(self.read_op, byteorder='little')
             
-    def enable_logging(self):
-        self.log.setLevel(logging.DEBUG)
-    
-    def disable_logging(self):
-        self.log.setLevel(logging.WARNING)
-
-    def enable_write_backpressure(self, seednum=None):
+    def enable_write_backpressure(self, seednum=None, profile='uniform', **kwargs):
         if seednum is not None:
             self.base_seed = seednum
-        self.axi_master.write_if.aw_channel.set_pause_generator(cycle_pause(self.base_seed+1))
-        self.axi_master.write_if.w_channel.set_pause_generator(cycle_pause(self.base_seed+2))
-        self.axi_master.write_if.b_channel.set_pause_generator(cycle_pause(self.base_seed+3))
+        self.axi_master.write_if.aw_channel.set_pause_generator(cycle_pause(self.base_seed+1, profile, **kwargs))
+        self.axi_master.write_if.w_channel.set_pause_generator(cycle_pause(self.base_seed+2, profile, **kwargs))
+        self.axi_master.write_if.b_channel.set_pause_generator(cycle_pause(self.base_seed+3, profile, **kwargs))
     
-    def enable_read_backpressure(self, seednum=None):
+    def enable_read_backpressure(self, seednum=None, profile='uniform', **kwargs):
         if seednum is not None:
             self.base_seed = seednum
-        self.axi_master.read_if.r_channel.set_pause_generator(cycle_pause(self.base_seed+4))        
-        self.axi_master.read_if.ar_channel.set_pause_generator(cycle_pause(self.base_seed+5))        
+        self.axi_master.read_if.r_channel.set_pause_generator(cycle_pause(self.base_seed+4, profile, **kwargs))        
+        self.axi_master.read_if.ar_channel.set_pause_generator(cycle_pause(self.base_seed+5, profile, **kwargs))        
     
-    def enable_backpressure(self, seednum=None):
-        self.enable_write_backpressure(seednum)      
-        self.enable_read_backpressure(seednum)      
+    def enable_backpressure(self, seednum=None, profile='uniform', **kwargs):
+        self.enable_write_backpressure(seednum, profile, **kwargs)      
+        self.enable_read_backpressure(seednum, profile, **kwargs)      
     
     def disable_backpressure(self):
 #         self.axi_master.write_if.aw_channel.clear_pause_generator()
@@ -283,18 +335,68 @@ class AxiDriver:
         self.axi_master.read_if.ar_channel.set_pause_generator(itertools.cycle([0,]))      
     
     
-    async def poll(self, addr, data, length=None, debug=False):
-        self.log.debug(f"Poll  0x{addr:08x}: for 0x{data:04x}")
+    async def _poll(self, addr, data, length, debug, mask, compare, backoff, max_backoff, signal, edge):
+        delay = backoff
         while True:
-            await self.read(addr, debug=debug)
-            if data == self.returned_val:
-                self.log.debug(f"Condition Satisified")
-                break
-        return
+            await self.read(addr, length=length, debug=debug)
+            self.poll_reads += 1
+            value = self.returned_val
+            if compare is not None:
+                if compare(value):
+                    return
+            elif mask is not None:
+                if (data & mask) == (value & mask):
+                    return
+            elif data == value:
+                return
+            if signal is not None:
+                await edge(signal)
+            elif delay:
+                await ClockCycles(self.clk, delay)
+                if max_backoff is not None:
+                    delay = min(delay*2, max_backoff)
+
+    async def poll(self, addr, data=None, length=None, debug=False, mask=None, compare=None, backoff=0, max_backoff=None, max_cycles=None, timeout=None, timeout_unit='ns', signal=None, edge=RisingEdge):
+        """Read addr until it matches data, returns the number of reads taken.
+
+        mask limits the comparison to some bits, compare is a function of the
+        returned value that replaces the comparison altogether. Between reads
+        wait backoff clock cycles, doubling each miss up to max_backoff, or
+        wait for an edge on signal. Exceeding max_cycles clock cycles or
+        timeout sim time raises TimeoutError.
+        """
+        if data is None and compare is None:
+            raise Exception(f"Poll  0x{addr:08x}: either data or compare must be given")
+        if data is not None:
+            self.log.debug(f"Poll  0x{addr:08x}: for 0x{data:04x}")
+        else:
+            self.log.debug(f"Poll  0x{addr:08x}:")
+        self.poll_reads = 0
+        poll_op = start_soon(self._poll(addr, data, length, debug, mask, compare, backoff, max_backoff, signal, edge))
+        limits = []
+        if max_cycles is not None:
+            limits.append(ClockCycles(self.clk, max_cycles))
+        if timeout is not None:
+            limits.append(Timer(timeout, timeout_unit))
+        if limits:
+            await First(poll_op, *limits)
+            if not poll_op.done():
+                poll_op.kill()
+                raise TimeoutError(f"Poll  0x{addr:08x}: condition not met after {self.poll_reads} reads")
+        else:
+            await poll_op
+        self.log.debug(f"Condition Satisified after {self.poll_reads} reads")
+        return self.poll_reads
 
     def check_read(self, debug=True):
-        if debug:
-            self.log.debug(f"Read  0x{self.addr:08x}: 0x{self.returned_val:0{self.length*2}x}")
+        if isbuffer(self.data):
+            if debug and self.debug_enabled:
+                self.log.debug("Read  0x%08x: %d bytes", self.addr, len(self.returned_bytes))
+            if not tobuffer(self.data) == self.returned_bytes:
+                raise Exception(f"Expected {bytelength(self.data)} bytes doesn't match returned {len(self.returned_bytes)} bytes")
+            return
+        if debug and self.debug_enabled:
+            self.log.debug("Read  0x%08x: 0x%0*x", self.addr, self.length*2, self.returned_val)
         if not self.returned_val == self.data and not None == self.data:
             raise Exception(f"Expected 0x{self.data:08x} doesn't match returned 0x{self.returned_val:08x}")
     
@@ -302,7 +404,13 @@ class AxiDriver:
         self.addr = addr
         self.data = data
         self.len = length
+        if self.latency is not None:
+            t0 = get_sim_time('step')
         self.read_op = await self.axi_master.read(self.addr, self.length, arid=self.arid)
+        if self.latency is not None:
+            self.latency.record('read', addr, t0)
+        if self.trace is not None:
+            self.trace.record(READ, addr, self.returned_bytes, resp=int(getattr(self.read_op, 'resp', 0)), txid=self.arid)
         self.check_read(debug)
         return self.read_op
         
@@ -317,17 +425,28 @@ class AxiDriver:
         else:
             self.data = data
         self.writedata = self.data
-        if debug:
-            self.log.debug(f"Write 0x{self.addr:08x}: 0x{self.data:0{self.length*2}x}")
-        bytesdata = tobytes(self.data, self.length)
-        #bytesdata = self.data.to_bytes(self.length, 'little')
-        await self.axi_master.write(addr, bytesdata, awid=self.arid)
+        if isbuffer(self.data):
+            if debug and self.debug_enabled:
+                self.log.debug("Write 0x%08x: %d bytes", self.addr, self.length)
+            bytesdata = tobuffer(self.data)
+        else:
+            if debug and self.debug_enabled:
+                self.log.debug("Write 0x%08x: 0x%0*x", self.addr, self.length*2, self.data)
+            bytesdata = tobytes(self.data, self.length)
+        if self.latency is not None:
+            t0 = get_sim_time('step')
+        resp = await self.axi_master.write(addr, bytesdata, awid=self.arid)
+        if self.latency is not None:
+            self.latency.record('write', addr, t0)
+        if self.trace is not None:
+            self.trace.record(WRITE, addr, bytesdata, resp=int(getattr(resp, 'resp', 0)), txid=self.arid)
 
     async def rmodw(self, addr, data, length=None, debug=True):
         await self.read(addr, length=None, debug=False)
         newdata = data | self.returned_val
-        if debug:
-            self.log.debug(f"RmodW 0x{addr:08x}: 0x{self.returned_val:0{self.length*2}x} | 0x{data:0{self.length*2}x} -> 0x{newdata:0{self.length*2}x}")
+        if debug and self.debug_enabled:
+            width = self.length*2
+            self.log.debug("RmodW 0x%08x: 0x%0*x | 0x%0*x -> 0x%0*x", addr, width, self.returned_val, width, data, width, newdata)
         await self.write(addr, newdata, length=None, debug=False)
 
     
@@ -354,8 +473,8 @@ class AxiDriver:
         self.data = data
         self.len = length
         self.init_read(self.addr, self.length, arid=self.arid)
-        if debug:
-            self.log.debug(f"Read  0x{addr:08x}:")
+        if debug and self.debug_enabled:
+            self.log.debug("Read  0x%08x:", addr)
     
     def write_nowait(self, addr, data=None, length=None, debug=True):
         self.len = length
@@ -367,61 +486,223 @@ class AxiDriver:
         else:
             self.data = data
         self.writedata = self.data
-        if debug:
-            self.log.debug(f"Write 0x{self.addr:08x}: 0x{self.data:08x}")
-        bytesdata = tobytes(self.data, self.length)
-        #bytesdata = self.data.to_bytes(self.length, 'little')
+        if isbuffer(self.data):
+            if debug and self.debug_enabled:
+                self.log.debug("Write 0x%08x: %d bytes", self.addr, self.length)
+            bytesdata = tobuffer(self.data)
+        else:
+            if debug and self.debug_enabled:
+                self.log.debug("Write 0x%08x: 0x%08x", self.addr, self.data)
+            bytesdata = tobytes(self.data, self.length)
         self.write_op = self.axi_master.init_write(self.addr, bytesdata, awid=self.arid)
 
+    async def _run_window(self, jobs, window=8):
+        # keep up to window jobs in flight, start the next as soon as any completes
+        inflight = [0]
+        done = Event()
+
+        async def run(job):
+            try:
+                await job
+            finally:
+                inflight[0] -= 1
+                done.set()
+
+        tasks = []
+        for job in jobs:
+            while inflight[0] >= window:
+                done.clear()
+                await done.wait()
+            inflight[0] += 1
+            tasks.append(start_soon(run(job)))
+        for task in tasks:
+            await task
+
+    async def _write_one(self, addr, data, length, awid, debug=False):
+        if debug and self.debug_enabled:
+            self.log.debug("Write 0x%08x: 0x%0*x", addr, length*2, data)
+        if self.latency is not None:
+            t0 = get_sim_time('step')
+        bytesdata = tobytes(data, length)
+        resp = await self.axi_master.write(addr, bytesdata, awid=awid)
+        if self.latency is not None:
+            self.latency.record('write', addr, t0)
+        if self.trace is not None:
+            self.trace.record(WRITE, addr, bytesdata, resp=int(getattr(resp, 'resp', 0)), txid=awid)
+
+    async def _read_one(self, index, addr, length, arid, results):
+        if self.latency is not None:
+            t0 = get_sim_time('step')
+        resp = await self.axi_master.read(addr, length, arid=arid)
+        if self.latency is not None:
+            self.latency.record('read', addr, t0)
+        if self.trace is not None:
+            self.trace.record(READ, addr, resp.data, resp=int(resp.resp), txid=arid)
+        results[index] = int.from_bytes(resp.data, byteorder='little')
+
+    async def write_many(self, addrs, data=None, length=None, window=8, ids=None, debug=False):
+        """Write a sequence of addresses keeping up to window transactions in flight.
+
+        The transactions are spread round robin across the AXI IDs in ids,
+        defaults to the single ID of this driver.
+        """
+        if ids is None:
+            ids = [self.awid]
+        addrs = list(addrs)
+        self.len = length
+        self.data = None
+        if length is None:
+            length = self.length
+        if data is None:
+            data = [randint(0, (1 << (8*length))-1) for i in addrs]
+        else:
+            data = list(data)
+        if not len(data) == len(addrs):
+            raise Exception(f"Number of addresses {len(addrs)} doesn't match number of data words {len(data)}")
+        self.writedata = data
+        jobs = (self._write_one(a, d, length, ids[i % len(ids)], debug) for i, (a, d) in enumerate(zip(addrs, data)))
+        await self._run_window(jobs, window)
+        return data
+
+    async def read_many(self, addrs, data=None, length=None, window=8, ids=None, debug=False):
+        """Read a sequence of addresses keeping up to window transactions in flight.
+
+        Results are returned in address order whatever order the responses
+        arrive in. If data is given every word is compared and a single
+        exception lists all the mismatches.
+        """
+        if ids is None:
+            ids = [self.arid]
+        addrs = list(addrs)
+        self.len = length
+        self.data = None
+        if length is None:
+            length = self.length
+        results = [None] * len(addrs)
+        jobs = (self._read_one(i, a, length, ids[i % len(ids)], results) for i, a in enumerate(addrs))
+        await self._run_window(jobs, window)
+        self.read_results = results
+        if debug and self.debug_enabled:
+            for a, r in zip(addrs, results):
+                self.log.debug("Read  0x%08x: 0x%0*x", a, length*2, r)
+        if data is not None:
+            mismatches = [(a, d, r) for a, d, r in zip(addrs, data, results) if not d == r and d is not None]
+            if mismatches:
+                detail = ", ".join(f"0x{a:08x}: expected 0x{d:08x} returned 0x{r:08x}" for a, d, r in mismatches[:8])
+                raise Exception(f"{len(mismatches)} of {len(addrs)} reads mismatched, {detail}")
+        return results
+
     
-class AxiStreamDriver:
+class AxiStreamDriver(MetricsMixin, TraceMixin, CocoTBExtLogger):
     def __init__(self, dut, axi_prefix="m_axi", clk_name="m_aclk", reset_name=None, seednum=None):
-        self.log = logging.getLogger(f"cocotb.AxiStreamDriver")
-        self.enable_logging()
+        CocoTBExtLogger.__init__(self, type(self).__name__, enable=False)
         
+        self.clk = getattr(dut, clk_name)
+        self.metrics = None
+        self.trace = None
         if reset_name is None:
             self.axis_source = AxiStreamSource(AxiStreamBus.from_prefix(dut, axi_prefix), getattr(dut, clk_name))
         else:
             self.axis_source = AxiStreamSource(AxiStreamBus.from_prefix(dut, axi_prefix), getattr(dut, clk_name), dut.reset)
         self.axis_source.log.setLevel(logging.WARNING)
         self.tdata_length = len(self.axis_source.bus.tdata)
+        if seednum is not None:
+            self.base_seed = seednum
+        else:
+            self.base_seed = randint(0,0xffffff)
         #self.enable_backpressure()
         
         
-    def enable_logging(self):
-        self.log.setLevel(logging.DEBUG)
-    
-    def disable_logging(self):
-        self.log.setLevel(logging.WARNING)
+    def _metrics_channels(self):
+        return axis_channels(self.axis_source.bus)
 
-    def enable_backpressure(self):
-        base_seed = randint(0,0xffffff)
-        self.axis_source.set_pause_generator(cycle_pause(base_seed))
+    def enable_backpressure(self, seednum=None, profile='uniform', **kwargs):
+        if seednum is not None:
+            self.base_seed = seednum
+        base_seed = self.base_seed
+        self.axis_source.set_pause_generator(cycle_pause(base_seed, profile, **kwargs))
 
     def disable_backpressure(self):
         #self.axis_source.clear_pause_generator()
         self.axis_source.set_pause_generator(itertools.cycle([0,]))
     
     async def write(self, tdata, length=None, **kwargs):
-        if length is None:
-            if 0 == tdata:
-                length = int(self.tdata_length/8)
-            else:
-                length = math.ceil(math.log2(tdata)/self.tdata_length)*int(self.tdata_length/8)
-        self.log.debug(f"Write 0x{tdata:08x}")
-        #bytesdata = tdata.to_bytes(length, 'little')
-        bytesdata = tobytes(tdata, length)
+        if isbuffer(tdata):
+            if self.debug_enabled:
+                self.log.debug("Write %d bytes", bytelength(tdata))
+            bytesdata = tobuffer(tdata)
+        else:
+            if length is None:
+                length = bytelength(tdata, self.tdata_length//8)
+            if self.debug_enabled:
+                self.log.debug("Write 0x%08x", tdata)
+            bytesdata = tobytes(tdata, length)
         frame = AxiStreamFrame(bytesdata, **kwargs)
+        if self.trace is not None:
+            self.trace.record(WRITE, data=bytesdata)
         await self.axis_source.write(frame)
 
     async def wait(self):
         await self.axis_source.wait()
 
-class AxiStreamReceiver:
+    def _file_chunks(self, path, chunk):
+        with open(path, 'rb') as f:
+            if 0 == os.fstat(f.fileno()).st_size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                for i in range(0, len(mm), chunk):
+                    yield mm[i:i+chunk]
+
+    async def _send_chunk(self, index, buf, sideband):
+        kwargs = {}
+        for k, v in sideband.items():
+            kwargs[k] = v(index, buf) if callable(v) else v
+        if self.trace is not None:
+            self.trace.record(WRITE, data=buf)
+        await self.axis_source.send(AxiStreamFrame(tobuffer(buf), **kwargs))
+
+    async def stream(self, source, depth=4, chunk=None, **kwargs):
+        """Send every buffer from source as its own frame, returns the frame count.
+
+        source is an iterator or async iterator of buffers, a single large
+        buffer or the path of a capture file, which is memory mapped. Buffers
+        and files are cut into frames of chunk bytes. No more than depth frames
+        are queued in the source at once. tkeep, tid, tdest and tuser can be
+        values or functions of (index, chunk) evaluated per frame.
+        """
+        if chunk is None:
+            chunk = (self.tdata_length//8)*256
+        if isinstance(source, (str, os.PathLike)):
+            source = self._file_chunks(source, chunk)
+        elif isbuffer(source):
+            source = chunks(source, chunk)
+        limit = self.axis_source.queue_occupancy_limit_frames
+        self.axis_source.queue_occupancy_limit_frames = depth
+        self.stream_frames = 0
+        self.stream_bytes = 0
+        try:
+            if hasattr(source, '__aiter__'):
+                async for buf in source:
+                    await self._send_chunk(self.stream_frames, buf, kwargs)
+                    self.stream_frames += 1
+                    self.stream_bytes += bytelength(buf)
+            else:
+                for buf in source:
+                    await self._send_chunk(self.stream_frames, buf, kwargs)
+                    self.stream_frames += 1
+                    self.stream_bytes += bytelength(buf)
+        finally:
+            self.axis_source.queue_occupancy_limit_frames = limit
+        self.log.debug(f"Streamed {self.stream_frames} frames, {self.stream_bytes} bytes")
+        return self.stream_frames
+
+class AxiStreamReceiver(MetricsMixin, TraceMixin, CocoTBExtLogger):
     def __init__(self, dut, axi_prefix="s_axi", clk_name="s_aclk", reset_name=None, seednum=None):
-        self.log = logging.getLogger(f"cocotb.AxiStreamSink")
-        self.enable_logging()
+        CocoTBExtLogger.__init__(self, "AxiStreamSink", enable=False)
         
+        self.clk = getattr(dut, clk_name)
+        self.metrics = None
+        self.trace = None
         self.axis_sink = AxiStreamSink(AxiStreamBus.from_prefix(dut, axi_prefix), getattr(dut, clk_name))
         self.axis_sink.log.setLevel(logging.WARNING)
         self.axis_mon = AxiStreamMonitor(AxiStreamBus.from_prefix(dut, axi_prefix), getattr(dut, clk_name))
@@ -432,49 +713,81 @@ class AxiStreamReceiver:
         seed(self.base_seed)
         self.log.debug(f"Seed is set to {self.base_seed}")
  
+    def _metrics_channels(self):
+        return axis_channels(self.axis_sink.bus)
+
     @property
     def length(self):
         if self.len is None:
-            if not 0 == self.data and not self.data is None:
-                return math.ceil(math.log2(self.data)/32)*4
+            if self.data is not None:
+                return bytelength(self.data, 4)
             else:
                 return 4
         return self.len
 
+    @property
+    def returned_bytes(self):
+        if hasattr(self.read_op, "tdata"):
+            return self.read_op.tdata
+        return self.read_op
+
     @property
     def returned_val(self):
         if hasattr(self.read_op, "data"):
             return tointeger(self.read_op.data)
         else:
-            return tointeger(self.read_op)
+            return tointeger(self.returned_bytes)
 
     def check_read(self, debug=True):
-        if debug:
-            self.log.debug(f"Receive:          0x{self.returned_val:0{self.length*2}x}")
+        if isbuffer(self.data):
+            if debug and self.debug_enabled:
+                self.log.debug("Receive:          %d bytes", len(self.returned_bytes))
+            if not tobuffer(self.data) == self.returned_bytes:
+                raise Exception(f"Expected {bytelength(self.data)} bytes doesn't match returned {len(self.returned_bytes)} bytes")
+            return
+        if debug and self.debug_enabled:
+            self.log.debug("Receive:          0x%0*x", self.length*2, self.returned_val)
         if not self.returned_val == self.data and not None == self.data:
             raise Exception(f"Expected 0x{self.data:08x} doesn't match returned 0x{self.returned_val:08x}")
             
-    def enable_logging(self):
-        self.log.setLevel(logging.DEBUG)
-    
-    def disable_logging(self):
-        self.log.setLevel(logging.WARNING)
-
     def pause(self):
         self.axis_sink.pause = True
 
     def unpause(self):
         self.axis_sink.pause = False
 
-    def enable_backpressure(self, seednum=None):
+    def enable_backpressure(self, seednum=None, profile='uniform', **kwargs):
         if seednum is not None:
             self.base_seed = seednum
-        self.axis_sink.set_pause_generator(cycle_pause(self.base_seed))        
+        self.axis_sink.set_pause_generator(cycle_pause(self.base_seed, profile, **kwargs))        
+
+    def attach_scoreboard(self, expected, window=64, key=None, max_records=32):
+        """Check every received frame against expected, see StreamScoreboard.
+
+        While attached the scoreboard consumes the frames, recv() should not
+        be used at the same time.
+        """
+        self.scoreboard = StreamScoreboard(expected, window=window, key=key, max_records=max_records)
+        self._scoreboard_cr = start_soon(self._run_scoreboard())
+        return self.scoreboard
+
+    def detach_scoreboard(self):
+        self._scoreboard_cr.kill()
+        return self.scoreboard
+
+    async def _run_scoreboard(self):
+        while True:
+            frame = await self.axis_sink.recv()
+            if self.trace is not None:
+                self.trace.record(READ, data=frame.tdata)
+            self.scoreboard.compare(frame)
 
     async def recv(self, data=None, debug=False):
         self.data = data
         self.len = None
         self.read_op = await self.axis_sink.recv()
+        if self.trace is not None:
+            self.trace.record(READ, data=self.returned_bytes)
         self.check_read(debug)
         return self.read_op
 
@@ -1,48 +1,171 @@
 from cocotb.clock import Clock
 from cocotb import start_soon
-from cocotb.triggers import RisingEdge, Timer
+from cocotb.triggers import RisingEdge, Timer, Event
+from cocotb.utils import get_sim_time, get_sim_steps
 from .diff_clock import DiffClock
 
+# how many of each unit make up a ns
+_PER_NS = {'fs': 1000000, 'ps': 1000, 'ns': 1, 'us': 1e-3, 'ms': 1e-6, 'sec': 1e-9}
+
 class Clk:
-    def __init__(self, dut, period=10, units="ns", clkname='clk'):
+    def __init__(self, dut, period=10, units="ns", clkname='clk', phase=0, start=True):
         self.clk = getattr(dut, clkname)
         self.period = period
-        start_soon(Clock(self.clk, self.period, units=units).start())        
+        self.units = units
+        self.phase = phase
+        self.task = None
+        self.cycles_base = 0
+        self._timebase()
+        if start:
+            self.start()
+
+    def _timebase(self):
+        # the clock toggles every half period from t0, rising edge n is at t0 + n*period_steps
+        self.period_steps = 2*get_sim_steps(self.period/2, self.units)
+        self.t0 = get_sim_time('step') + get_sim_steps(self.phase, self.units)
+
+    def _clock(self):
+        return Clock(self.clk, self.period, units=self.units)
+
+    async def _run(self):
+        if self.phase:
+            await Timer(self.phase, self.units)
+        await self._clock().start()
+
+    @property
+    def running(self):
+        return self.task is not None
+
+    def start(self):
+        if self.task is None:
+            self._timebase()
+            self.task = start_soon(self._run())
+
+    def stop(self):
+        """Stop the clock, the cycle count is frozen and carries on from
+        there if the clock is started again."""
+        if self.task is not None:
+            self.cycles_base = self.cycles
+            self.task.kill()
+            self.task = None
+
+    def park(self):
+        """Stop the clock and hold it low."""
+        self.stop()
+        self.clk.value = 0
+
+    @property
+    def cycles(self):
+        """Number of rising edges while the clock has been running."""
+        if self.task is None:
+            return self.cycles_base
+        return self.cycles_base + max((get_sim_time('step') - self.t0) // self.period_steps, 0)
+
+    def _check_running(self):
+        if self.task is None:
+            raise Exception(f"Clock {self.clk._name} is stopped, waiting on it would never return")
+
+    async def at_cycle(self, n):
+        """Wait for rising edge n, counted from the start of the clock, with
+        one Timer and one RisingEdge however far away it is."""
+        self._check_running()
+        target = self.t0 + (n - self.cycles_base)*self.period_steps
+        now = get_sim_time('step')
+        if target <= now:
+            return
+        wake = target - self.period_steps//2
+        if wake > now:
+            await Timer(wake - now, 'step')
+        await RisingEdge(self.clk)
+
+    async def after(self, length=1):
+        """Wait for the next length rising edges."""
+        await self.at_cycle(self.cycles + int(length))
 
     async def wait_clkn(self, length=1):
-        for i in range(int(length)):
-            await RisingEdge(self.clk)
+        if length > 2:
+            await self.after(length)
+        else:
+            self._check_running()
+            for i in range(int(length)):
+                await RisingEdge(self.clk)
 
     async def end_test(self, length=10):
        await self.wait_clkn(length)
 
 class DClk(Clk):
-    def __init__(self, dut, period=10, units="ns", clkname='clk'):
+    def __init__(self, dut, period=10, units="ns", clkname='clk', single=True, phase=0, start=True):
         self.clk_p = getattr(dut, clkname + "_p")
         self.clk_n = getattr(dut, clkname + "_n")
         self.period = period
-        start_soon(DiffClock(self.clk_p, self.clk_n, self.period, units=units).start())        
+        self.units = units
+        self.phase = phase
+        self.single = single
+        self.task = None
+        self.cycles_base = 0
+        self._timebase()
+        if start:
+            self.start()
+
+    def _clock(self):
+        return DiffClock(self.clk_p, self.clk_n, self.period, units=self.units, single=self.single)
+
+    def park(self):
+        self.stop()
+        self.clk_p.value = 0
+        self.clk_n.value = 1
 
     @property
     def clk(self):
         return self.clk_p
 
 class Reset:
-    def __init__(self, dut, clk, reset_length=100, reset_sense=1, resetname='reset'):
+    def __init__(self, dut, clk, reset_length=100, reset_sense=1, resetname='reset', start=True, release_delay=0):
         self.reset = getattr(dut, resetname)
         self.reset_length = reset_length
         self.reset_sense = reset_sense
+        self.release_delay = release_delay
         self.clk = clk
         self.finished = False
+        self.done = Event()
+        self.hooks = []
 
         self.reset.setimmediatevalue(self.reset_sense)
-        start_soon(self.set_reset())
-    
-    async def set_reset(self):
+        if start:
+            start_soon(self.set_reset())
+
+    def add_hook(self, func):
+        """Call func() every time reset is asserted, e.g. to flush a driver's queues."""
+        self.hooks.append(func)
+
+    def remove_hook(self, func):
+        self.hooks.remove(func)
+
+    def assert_reset(self):
+        self.reset.value = self.reset_sense
         self.finished = False
-        await self.clk.wait_clkn(self.reset_length)
+        self.done.clear()
+        for func in self.hooks:
+            func()
+
+    async def deassert_reset(self, delay=None):
+        """Release reset on a rising edge, delay clocks from now."""
+        if delay is None:
+            delay = self.release_delay
+        if delay:
+            await self.clk.wait_clkn(delay)
         self.reset.value = (~self.reset_sense)  & 0x1
         self.finished = True
+        self.done.set()
+
+    async def set_reset(self, length=None):
+        self.assert_reset()
+        await self.clk.wait_clkn(self.reset_length if length is None else length)
+        await self.deassert_reset()
+
+    async def wait(self):
+        """Return once reset has been released."""
+        await self.done.wait()
 
 class ClkReset:
    def __init__(self, dut, period=10, clk_freq=None, reset_length=100, reset_sense=1, clkname='clk', resetname='reset'):
@@ -58,5 +181,106 @@ class ClkReset:
    async def wait_clkn(self, length=1):
        await self.clk.wait_clkn(length)
 
+   async def wait_reset(self):
+       await self.reset.wait()
+
    async def end_test(self, length=10):
        await self.wait_clkn(length)
+
+class ClockTree:
+    """Clocks and resets for several domains, built from a list of dicts.
+
+    Each domain has a ``name`` and optionally:
+
+    * ``clkname`` - clock signal, defaults to the name
+    * ``period``, ``freq`` (MHz) or ``ratio`` (multiple of base_period)
+    * ``phase`` - delay before the first edge, in units
+    * ``diff`` - drive clkname_p/clkname_n with a DClk
+    * ``scale`` - stretch the period, to slow down a domain the test does not use
+    * ``enabled`` - False holds the clock low and its reset asserted
+    * ``resetname``, ``reset_length``, ``reset_sense``, ``release_delay``
+    * ``reset_order`` - resets are released in ascending order, equal orders together
+    """
+
+    def __init__(self, dut, domains, base_period=10, units="ns", scale=1):
+        self.clks = {}
+        self.resets = {}
+        self.order = {}
+        self.finished = False
+        self.reset_done = Event()
+        self.started = {}
+        phased = []
+        for domain in domains:
+            name = domain['name']
+            if 'freq' in domain:
+                # freq is in MHz
+                period = 1000/domain['freq']*_PER_NS[units]
+            elif 'ratio' in domain:
+                period = base_period*domain['ratio']
+            else:
+                period = domain.get('period', base_period)
+            period *= domain.get('scale', scale)
+            kwargs = dict(period=period, units=units, clkname=domain.get('clkname', name), phase=domain.get('phase', 0), start=False)
+            clk = DClk(dut, **kwargs) if domain.get('diff', False) else Clk(dut, **kwargs)
+            self.clks[name] = clk
+            enabled = domain.get('enabled', True)
+            if not enabled:
+                clk.park()
+            elif clk.phase:
+                phased.append(name)
+                self.started[name] = Event()
+            else:
+                clk.start()
+            if 'resetname' in domain:
+                self.resets[name] = Reset(dut, clk, reset_length=domain.get('reset_length', 100), reset_sense=domain.get('reset_sense', 1), resetname=domain['resetname'], start=False, release_delay=domain.get('release_delay', 0))
+                if enabled:
+                    self.order[name] = domain.get('reset_order', 0)
+        if phased:
+            start_soon(self._start_phased(sorted(phased, key=lambda n: self.clks[n].phase)))
+        start_soon(self._sequence_resets())
+
+    async def _start_phased(self, names):
+        # one coroutine brings up every phase shifted clock in turn
+        elapsed = 0
+        for name in names:
+            clk = self.clks[name]
+            if clk.phase > elapsed:
+                await Timer(clk.phase - elapsed, clk.units)
+                elapsed = clk.phase
+            clk.phase = 0
+            clk.start()
+            self.started[name].set()
+
+    async def _sequence_resets(self):
+        for order in sorted(set(self.order.values())):
+            group = [name for name, o in self.order.items() if o == order]
+            for name in group:
+                start_soon(self._reset_domain(name))
+            for name in group:
+                await self.resets[name].wait()
+        self.finished = True
+        self.reset_done.set()
+
+    async def _reset_domain(self, name):
+        # a phase shifted clock is not running yet, reset counts its cycles
+        if name in self.started:
+            await self.started[name].wait()
+        await self.resets[name].set_reset()
+
+    def __getitem__(self, name):
+        return self.clks[name]
+
+    def cycles(self, name):
+        return self.clks[name].cycles
+
+    async def wait_clkn(self, name, length=1):
+        await self.clks[name].wait_clkn(length)
+
+    async def wait_reset(self):
+        await self.reset_done.wait()
+
+    def stop(self, name):
+        self.clks[name].park()
+
+    def start(self, name):
+        self.clks[name].start()
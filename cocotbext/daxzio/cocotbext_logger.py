@@ -21,12 +21,76 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 
 """
+import atexit
 import logging
+from logging.handlers import MemoryHandler
 from datetime import datetime
 
 
-class CocoTBExtLogger:
-    def __init__(self, name="default", enable=True, start_year=2023):
+class _ParentHandler(logging.Handler):
+    # hand buffered records on to the handlers the logger would have propagated to
+    def __init__(self, logger):
+        super().__init__()
+        self.logger = logger
+
+    def emit(self, record):
+        self.logger.handle(record)
+
+
+def buffer_log(log, capacity=4096, flush_level=logging.ERROR):
+    """Hold the records of log in memory, they are emitted in bulk when
+    capacity is reached, a record at flush_level arrives or on flush_log().
+
+    cocotb has no hook at the end of each test, so call flush_log() before a
+    test returns to keep its records next to its result. Anything still held
+    when the simulator exits is flushed then.
+    """
+    for handler in log.handlers:
+        if isinstance(handler, MemoryHandler):
+            return handler
+    handler = MemoryHandler(capacity, flushLevel=flush_level, target=_ParentHandler(log.parent))
+    atexit.register(handler.flush)
+    log.addHandler(handler)
+    log.propagate = False
+    return handler
+
+
+def flush_log(log):
+    for handler in log.handlers:
+        if isinstance(handler, MemoryHandler):
+            handler.flush()
+
+
+def unbuffer_log(log):
+    for handler in list(log.handlers):
+        if isinstance(handler, MemoryHandler):
+            handler.flush()
+            log.removeHandler(handler)
+            handler.close()
+            atexit.unregister(handler.flush)
+    log.propagate = True
+
+
+class LoggingMixin:
+    """Logging switches shared by the drivers, the class provides self.log."""
+
+    @property
+    def debug_enabled(self):
+        # the logging module caches this per logger until any level changes
+        return self.log.isEnabledFor(logging.DEBUG)
+
+    def buffer_logging(self, capacity=4096):
+        buffer_log(self.log, capacity)
+
+    def flush_logging(self):
+        flush_log(self.log)
+
+    def unbuffer_logging(self):
+        unbuffer_log(self.log)
+
+
+class CocoTBExtLogger(LoggingMixin):
+    def __init__(self, name="default", enable=False, start_year=2023):
         current_year = datetime.now().year
         if start_year == current_year:
             self.copyright_year = f'{start_year}'
@@ -0,0 +1,147 @@
+"""
+
+Copyright (c) 2024 Daxzio
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+import sys
+from array import array
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def isbuffer(val):
+    if isinstance(val, int):
+        return False
+    try:
+        memoryview(val)
+    except TypeError:
+        return False
+    return True
+
+
+def asview(val):
+    """Return a flat byte memoryview of any buffer without copying."""
+    view = val if isinstance(val, memoryview) else memoryview(val)
+    if not view.format == 'B' or not view.ndim == 1:
+        view = view.cast('B')
+    return view
+
+
+def tobytes(val, length=4):
+    """Little endian encode an int to length bytes, buffers are passed through."""
+    if not isinstance(val, int):
+        return asview(val)
+    return (val & ((1 << (8*length))-1)).to_bytes(length, 'little')
+
+
+def tointeger(val):
+    """Little endian decode a buffer, or a list of byte values, to an int."""
+    if isinstance(val, (bytes, bytearray)):
+        return int.from_bytes(val, 'little')
+    try:
+        return int.from_bytes(asview(val), 'little')
+    except TypeError:
+        return int.from_bytes(bytes(val), 'little')
+
+
+def tobuffer(val):
+    """Return something the cocotbext-axi drivers accept, copying only if needed."""
+    if isinstance(val, (bytes, bytearray)):
+        return val
+    return asview(val).tobytes()
+
+
+def bytelength(val, width=4):
+    """Number of bytes, in multiples of width, needed to hold val."""
+    if isinstance(val, int):
+        return max(-(-val.bit_length() // (8*width))*width, width)
+    return asview(val).nbytes
+
+
+def chunks(val, size):
+    """Split a buffer into zero copy slices of at most size bytes."""
+    view = asview(val)
+    for i in range(0, view.nbytes, size):
+        yield view[i:i+size]
+
+
+def first_mismatch(a, b):
+    """Offset of the first differing byte, -1 if the buffers are equal."""
+    a = asview(a)
+    b = asview(b)
+    n = min(a.nbytes, b.nbytes)
+    if a[:n] == b[:n]:
+        return -1 if a.nbytes == b.nbytes else n
+    # invariant, a[:lo] == b[:lo] and a[:hi] != b[:hi]
+    lo, hi = 0, n
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
+
+
+def towords(val):
+    """Unpack a little endian buffer into an array of 32 bit words, a partial
+    last word is zero padded."""
+    view = asview(val)
+    pad = -view.nbytes % 4
+    words = array('I')
+    words.frombytes(view if not pad else view.tobytes() + bytes(pad))
+    if 'big' == sys.byteorder:
+        words.byteswap()
+    return words
+
+
+def mismatch_ranges(a, b, block=4096):
+    """Return the (start, end) byte offsets of every run where the buffers
+    differ, bytes past the end of the shorter buffer count as different."""
+    a = asview(a)
+    b = asview(b)
+    n = min(a.nbytes, b.nbytes)
+    ranges = []
+    if np is not None:
+        diff = np.frombuffer(a[:n], dtype=np.uint8) != np.frombuffer(b[:n], dtype=np.uint8)
+        edges = np.flatnonzero(np.diff(diff.astype(np.int8), prepend=0, append=0))
+        ranges = list(zip(edges[0::2].tolist(), edges[1::2].tolist()))
+    else:
+        # compare whole blocks, only blocks that differ are walked byte by byte
+        for i in range(0, n, block):
+            x = a[i:i+block].tobytes()
+            y = b[i:i+block].tobytes()
+            if x == y:
+                continue
+            for j, (p, q) in enumerate(zip(x, y), i):
+                if p != q:
+                    if ranges and ranges[-1][1] == j:
+                        ranges[-1] = (ranges[-1][0], j+1)
+                    else:
+                        ranges.append((j, j+1))
+    if not a.nbytes == b.nbytes:
+        if ranges and ranges[-1][1] == n:
+            ranges[-1] = (ranges[-1][0], max(a.nbytes, b.nbytes))
+        else:
+            ranges.append((n, max(a.nbytes, b.nbytes)))
+    return ranges
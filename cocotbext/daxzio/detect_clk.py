@@ -1,15 +1,18 @@
+import heapq
 import logging
+from math import sqrt
+from cocotb import start_soon
 from cocotb.triggers import RisingEdge, FallingEdge
-from cocotb.triggers import Timer
+from cocotb.triggers import Timer, Event, First
 from cocotb.utils import get_sim_time
-async def detect_clk(clk, name="", expected=None, wait_start=400, continuous=False, tolerance=0.1):
+async def detect_clk(clk, name="", expected=None, wait_start=400, continuous=False, tolerance=0.1, every=64):
     test_clk = clk
     test_log = logging.getLogger(f"cocotb.detect_clk")
     await Timer(wait_start, 'ns')
     await RisingEdge(test_clk)
-    t0 = get_sim_time("step")
+    t0 = get_sim_time("ps")
     await FallingEdge(test_clk)
-    t1 = get_sim_time("step")
+    t1 = get_sim_time("ps")
     time_delta = t1 - t0
     test_clk_freq = 1000000 / (2 * time_delta)
     test_log.info(f"Detected Clock frequency {name}: {test_clk_freq} MHz")
@@ -19,14 +22,176 @@ async def detect_clk(clk, name="", expected=None, wait_start=400, continuous=Fal
         test_log.info(f"Expected: {expected} MHz")
         if abs(expected - test_clk_freq) >= (expected*tolerance):
             raise Exception(f"Frequency doesn't match expected, {expected} MHz, to within tolerance {tolerance}" )
-    while continuous:
-        await RisingEdge(test_clk)
-        t0 = get_sim_time("step")
-        await FallingEdge(test_clk)
-        t1 = get_sim_time("step")
-        new_time_delta = t1 - t0
-        new_clk_freq = 1000000 / (2 * time_delta)
-#         if not new_clk_freq == test_clk_freq:
-        if abs(new_clk_freq - test_clk_freq) >= (new_clk_freq*tolerance):
-            raise Exception("Change in clock frequency detected, {new_clk_freq} MHz {test_clk_freq} MHz" )
+    if continuous:
+        # watch for a change in frequency, sampling every so many periods
+        monitor = ClockMonitor(every=every, wait_start=0)
+        monitor.watch(test_clk, name, expected=test_clk_freq, tolerance=tolerance)
+        await monitor.finished.wait()
 
+
+class ClockStats:
+    """Running statistics of the sampled periods of one clock."""
+
+    def __init__(self, name, expected=None, tolerance=0.1):
+        self.name = name
+        self.expected = expected
+        self.tolerance = tolerance
+        self.clear()
+
+    def clear(self):
+        self.count = 0
+        self.min_period = None
+        self.max_period = None
+        self.mean_period = 0.0
+        self._m2 = 0.0
+        self.duty_sum = 0.0
+        self.stops = 0
+
+    def add(self, period, high):
+        self.count += 1
+        if self.min_period is None or period < self.min_period:
+            self.min_period = period
+        if self.max_period is None or period > self.max_period:
+            self.max_period = period
+        delta = period - self.mean_period
+        self.mean_period += delta / self.count
+        self._m2 += delta * (period - self.mean_period)
+        self.duty_sum += high / period
+
+    @property
+    def freq(self):
+        """Mean frequency in MHz."""
+        return 1000000 / self.mean_period if self.count else None
+
+    @property
+    def min_freq(self):
+        return 1000000 / self.max_period if self.count else None
+
+    @property
+    def max_freq(self):
+        return 1000000 / self.min_period if self.count else None
+
+    @property
+    def duty(self):
+        return self.duty_sum / self.count if self.count else None
+
+    @property
+    def jitter(self):
+        """Peak to peak and rms period jitter in ps."""
+        if not self.count:
+            return (None, None)
+        return (self.max_period - self.min_period, sqrt(self._m2 / self.count))
+
+    def asdict(self):
+        return {
+            'samples': self.count,
+            'freq': self.freq,
+            'min_freq': self.min_freq,
+            'max_freq': self.max_freq,
+            'duty': self.duty,
+            'jitter_pp': self.jitter[0],
+            'jitter_rms': self.jitter[1],
+            'stops': self.stops,
+        }
+
+
+class ClockMonitor:
+    """Measure a full period of every watched clock once every ``every``
+    periods, from a single coroutine that sleeps on a Timer in between.
+
+    Periods are in ps and frequencies in MHz. A sample more than tolerance
+    away from the expected frequency raises an exception.
+
+    Every edge is raced against timeout_periods of the clock's period, or
+    timeout ns before the period is known. A clock that misses it is counted
+    as stopped, or raises if fail_on_stop, and is tried again a sample later,
+    so one stopped clock never holds up the others.
+    """
+
+    def __init__(self, every=64, wait_start=400, timeout_periods=4, timeout=1000, fail_on_stop=False):
+        self.log = logging.getLogger("cocotb.ClockMonitor")
+        self.every = every
+        self.wait_start = wait_start
+        self.timeout_periods = timeout_periods
+        self.timeout = timeout
+        self.fail_on_stop = fail_on_stop
+        self.clocks = []
+        self.stats = {}
+        self._queue = []
+        self.finished = Event()
+        self.task = None
+
+    def watch(self, clk, name=None, expected=None, tolerance=0.1):
+        if name is None:
+            name = clk._name
+        if name in self.stats:
+            raise Exception(f"Clock {name} is already being monitored")
+        self.stats[name] = ClockStats(name, expected, tolerance)
+        self.clocks.append((clk, self.stats[name]))
+        heapq.heappush(self._queue, (get_sim_time('ps') + self.wait_start*1000, len(self.clocks)-1))
+        if self.task is None:
+            self.finished.clear()
+            self.task = start_soon(self._run())
+        return self.stats[name]
+
+    def stop(self):
+        if self.task is not None:
+            self.task.kill()
+            self.task = None
+        self._queue = []
+        self.clocks = []
+        self.finished.set()
+
+    def report(self):
+        return {name: stats.asdict() for name, stats in self.stats.items()}
+
+    def _limit(self, stats):
+        # ps to wait for any one edge
+        if stats.count:
+            return self.timeout_periods*stats.mean_period
+        if stats.expected is not None:
+            return self.timeout_periods*1000000/stats.expected
+        return self.timeout*1000
+
+    async def _edge(self, edge, limit):
+        timer = Timer(max(round(limit), 1), 'ps', round_mode='round')
+        return edge is await First(edge, timer)
+
+    async def _measure(self, clk, limit):
+        """A full period and its high time, None if the clock has stopped."""
+        if not await self._edge(RisingEdge(clk), limit):
+            return None
+        t0 = get_sim_time('ps')
+        if not await self._edge(FallingEdge(clk), limit):
+            return None
+        t1 = get_sim_time('ps')
+        if not await self._edge(RisingEdge(clk), limit):
+            return None
+        t2 = get_sim_time('ps')
+        return t2 - t0, t1 - t0
+
+    async def _run(self):
+        # only the clock due next is ever waited on, the rest cost nothing
+        while self._queue:
+            when, i = heapq.heappop(self._queue)
+            now = get_sim_time('ps')
+            if when > now:
+                await Timer(when - now, 'ps', round_mode='round')
+            clk, stats = self.clocks[i]
+            limit = self._limit(stats)
+            sample = await self._measure(clk, limit)
+            if sample is None:
+                stats.stops += 1
+                if self.fail_on_stop:
+                    raise Exception(f"Clock {stats.name} has stopped")
+                self.log.warning("Clock %s has stopped", stats.name)
+                heapq.heappush(self._queue, (get_sim_time('ps') + round((self.every-1)*limit/self.timeout_periods), i))
+                continue
+            period, high = sample
+            stats.add(period, high)
+            freq = 1000000 / period
+            if stats.expected is not None and abs(stats.expected - freq) >= (stats.expected*stats.tolerance):
+                raise Exception(f"Change in clock frequency detected, {stats.name} {freq} MHz {stats.expected} MHz")
+            heapq.heappush(self._queue, (get_sim_time('ps') + (self.every-1)*period, i))
+        self.task = None
+        self.finished.set()
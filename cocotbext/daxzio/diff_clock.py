@@ -21,8 +21,11 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
 THE SOFTWARE.
 
 """
+import itertools
 from cocotb import start_soon
 from cocotb.clock import Clock
+from cocotb.triggers import Timer
+from cocotb.utils import get_sim_steps
 
 
 class DiffClock(Clock):
@@ -31,8 +34,9 @@ class DiffClock(Clock):
     Instances of this class should call its :meth:`start` method
     and pass the coroutine object to one of the functions in :ref:`task-management`.
 
-    This will create a clocking task that drives the two differential
-    signals at the desired period/frequency.
+    This will create a single clocking task that drives both differential
+    signals at the desired period/frequency, the n-side is written as the
+    inverse of the p-side in the same timestep, so the pair cannot drift.
 
     Example:
 
@@ -50,6 +54,9 @@ class DiffClock(Clock):
             ``'step'``, ``'fs'``, ``'ps'``, ``'ns'``, ``'us'``, ``'ms'``, ``'sec'``.
             When *units* is ``'step'``,
             the timestep is determined by the simulator (see :make:var:`COCOTB_HDL_TIMEPRECISION`).
+        single (bool, optional): Drive both signals from one Python task
+            (default). When ``False`` each side gets its own :class:`~cocotb.clock.Clock`,
+            which lets the simulator-native GPI clock take over where cocotb provides one.
         impl: One of
             ``'auto'``, ``'gpi'``, ``'py'``.
             Specify whether the clock is implemented with a :class:`~cocotb.simulator.GpiClock` (faster), or with a Python coroutine.
@@ -63,12 +70,29 @@ class DiffClock(Clock):
         self,
         signal_p,
         signal_n,
-        *args,
+        period,
+        units="step",
+        single=True,
         **kwargs,
     ):
-        Clock.__init__(self, signal_p, *args,**kwargs)
-        self.signal_n = Clock(signal_n, *args,**kwargs)
-
-    async def start(self, start_high=True):
-        start_soon(self.signal_n.start(start_high=not(start_high)))
-        await Clock.start(self, start_high=start_high)
+        Clock.__init__(self, signal_p, period, units=units, **kwargs)
+        self.signal_n = Clock(signal_n, period, units=units, **kwargs)
+        self.single = single
+        self.half_period_steps = get_sim_steps(period / 2, units)
+
+    async def start(self, cycles=None, start_high=True):
+        if not self.single:
+            start_soon(self.signal_n.start(cycles=cycles, start_high=not(start_high)))
+            await Clock.start(self, cycles=cycles, start_high=start_high)
+            return
+        signal_p = self.signal
+        signal_n = self.signal_n.signal
+        high, low = (1, 0) if start_high else (0, 1)
+        t = Timer(self.half_period_steps, 'step')
+        for i in (itertools.count() if cycles is None else range(cycles)):
+            signal_p.value = high
+            signal_n.value = low
+            await t
+            signal_p.value = low
+            signal_n.value = high
+            await t
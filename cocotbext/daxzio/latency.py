@@ -0,0 +1,148 @@
+"""
+
+Copyright (c) 2024 Daxzio
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+import json
+from array import array
+from bisect import bisect_right
+from cocotb.utils import get_sim_time, get_time_from_sim_steps
+
+
+class LatencyHistogram:
+    """Latencies in sim steps, bucketed by power of two."""
+
+    def __init__(self):
+        self.counts = array('Q', bytes(8*65))
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, steps, count=1):
+        self.counts[min(steps.bit_length(), 64)] += count
+        self.count += count
+        self.total += steps*count
+        if steps > self.max:
+            self.max = steps
+
+    def merge(self, other):
+        for i, c in enumerate(other.counts):
+            self.counts[i] += c
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+
+    def percentile(self, p):
+        """Upper bound, in steps, of the bucket holding the p'th percentile."""
+        if not self.count:
+            return 0
+        target = self.count * p / 100
+        seen = 0
+        for bucket, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min((1 << bucket) - 1, self.max)
+        return self.max
+
+
+class LatencyTracker:
+    """Histograms of transaction latency per address region and direction.
+
+    regions is a list of (name, base, size), addresses outside every region
+    are counted under 'other'.
+    """
+
+    def __init__(self, regions=None, units='ns'):
+        self.units = units
+        self.regions = sorted(regions or [], key=lambda r: r[1])
+        self.bases = [r[1] for r in self.regions]
+        self.histograms = {}
+
+    def region(self, addr):
+        i = bisect_right(self.bases, addr) - 1
+        if i >= 0:
+            name, base, size = self.regions[i]
+            if addr < base + size:
+                return name
+        return 'other'
+
+    def record(self, direction, addr, start, end=None, count=1):
+        """Record a transaction from start to end, or count back to back
+        transactions sharing that time, each taking an equal share."""
+        if end is None:
+            end = get_sim_time('step')
+        key = (self.region(addr), direction)
+        hist = self.histograms.get(key)
+        if hist is None:
+            hist = self.histograms[key] = LatencyHistogram()
+        hist.add((end - start)//count, count)
+
+    def histogram(self, region=None, direction=None):
+        result = LatencyHistogram()
+        for (r, d), hist in self.histograms.items():
+            if (region is None or region == r) and (direction is None or direction == d):
+                result.merge(hist)
+        return result
+
+    def _time(self, steps):
+        return get_time_from_sim_steps(steps, self.units)
+
+    def stats(self, region=None, direction=None):
+        hist = self.histogram(region, direction)
+        return {
+            'count': hist.count,
+            'mean': self._time(hist.total) / hist.count if hist.count else 0.0,
+            'p50': self._time(hist.percentile(50)),
+            'p95': self._time(hist.percentile(95)),
+            'p99': self._time(hist.percentile(99)),
+            'max': self._time(hist.max),
+        }
+
+    def export(self, path=None):
+        """All histograms and their statistics as JSON, to path if given."""
+        result = {'units': self.units, 'histograms': []}
+        for (region, direction), hist in sorted(self.histograms.items()):
+            entry = {'region': region, 'direction': direction, 'buckets': list(hist.counts)}
+            entry.update(self.stats(region, direction))
+            result['histograms'].append(entry)
+        result = json.dumps(result, indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(result)
+        return result
+
+
+class LatencyMixin:
+    """enable_latency()/disable_latency() for the drivers, a block call of n
+    words is recorded as n transfers of 1/n of its time."""
+
+    latency = None
+
+    def enable_latency(self, regions=None, units='ns'):
+        """Record the latency of every transaction, see LatencyTracker."""
+        if self.latency is None:
+            self.latency = LatencyTracker(regions, units)
+        return self.latency
+
+    def disable_latency(self):
+        latency = self.latency
+        self.latency = None
+        return latency
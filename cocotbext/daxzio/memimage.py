@@ -0,0 +1,165 @@
+"""
+
+Copyright (c) 2024 Daxzio
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+import os
+import struct
+from random import Random
+
+# ELF program header type of a loadable segment
+PT_LOAD = 1
+
+
+def random_buffer(length, seednum=None, rng=None):
+    """length random bytes from a single getrandbits call."""
+    if rng is None:
+        rng = Random(seednum)
+    if not length:
+        return b''
+    return rng.getrandbits(8*length).to_bytes(length, 'little')
+
+
+def load_bin(path, address=0):
+    with open(path, 'rb') as f:
+        return [(address, f.read())]
+
+
+def _merge(pieces):
+    # join contiguous (address, bytes) pieces into segments
+    segments = []
+    for address, data in sorted(pieces, key=lambda p: p[0]):
+        if segments and segments[-1][0] + len(segments[-1][1]) == address:
+            segments[-1][1].extend(data)
+        else:
+            segments.append((address, bytearray(data)))
+    return [(address, bytes(data)) for address, data in segments]
+
+
+def load_ihex(path, address=0):
+    """Intel HEX, record types 00, 01, 02 and 04 are used, the rest ignored."""
+    pieces = []
+    base = 0
+    with open(path) as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            if not line.startswith(':'):
+                raise Exception(f"{path}:{n} is not an Intel HEX record")
+            record = bytes.fromhex(line[1:])
+            if not 0 == sum(record) & 0xff:
+                raise Exception(f"{path}:{n} has a bad checksum")
+            count, offset, rtype = record[0], (record[1] << 8) | record[2], record[3]
+            if 0x00 == rtype:
+                pieces.append((address + base + offset, record[4:4+count]))
+            elif 0x01 == rtype:
+                break
+            elif 0x02 == rtype:
+                base = ((record[4] << 8) | record[5]) << 4
+            elif 0x04 == rtype:
+                base = ((record[4] << 8) | record[5]) << 16
+    return _merge(pieces)
+
+
+def load_memh(path, address=0, width=None):
+    """$readmemh style, whitespace separated words with optional @address
+    lines counted in words, as written by objcopy -O verilog. The word width
+    in bytes is taken from the first word if not given."""
+    with open(path) as f:
+        tokens = [t.replace('_', '') for line in f for t in line.split('//')[0].split()]
+    if width is None:
+        words = [t for t in tokens if not t.startswith('@')]
+        width = (len(words[0])+1)//2 if words else 1
+    pieces = []
+    current = address
+    for token in tokens:
+        if token.startswith('@'):
+            current = address + int(token[1:], 16)*width
+        else:
+            if len(token) > 2*width:
+                raise Exception(f"{path} word {token} is wider than {width} bytes")
+            pieces.append((current, int(token, 16).to_bytes(width, 'little')))
+            current += width
+    return _merge(pieces)
+
+
+def load_elf(path, address=0):
+    """The PT_LOAD segments of an ELF file at their physical addresses,
+    zero filled out to the in memory size."""
+    with open(path, 'rb') as f:
+        image = f.read()
+    if not image[:4] == b'\x7fELF':
+        raise Exception(f"{path} is not an ELF file")
+    endian = '<' if 1 == image[5] else '>'
+    if 2 == image[4]:
+        phoff, = struct.unpack_from(endian + 'Q', image, 0x20)
+        phentsize, phnum = struct.unpack_from(endian + 'HH', image, 0x36)
+        fmt = 'IIQQQQQQ'
+    else:
+        phoff, = struct.unpack_from(endian + 'I', image, 0x1c)
+        phentsize, phnum = struct.unpack_from(endian + 'HH', image, 0x2a)
+        fmt = 'IIIIIIII'
+    segments = []
+    for i in range(phnum):
+        fields = struct.unpack_from(endian + fmt, image, phoff + i*phentsize)
+        if 2 == image[4]:
+            p_type, p_flags, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz, p_align = fields
+        else:
+            p_type, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz, p_flags, p_align = fields
+        if not PT_LOAD == p_type or not p_memsz:
+            continue
+        data = image[p_offset:p_offset+p_filesz] + bytes(p_memsz - p_filesz)
+        segments.append((address + p_paddr, data))
+    return segments
+
+
+LOADERS = {
+    'bin': load_bin,
+    'ihex': load_ihex,
+    'memh': load_memh,
+    'elf': load_elf,
+}
+
+_EXTENSIONS = {
+    '.hex': 'ihex',
+    '.ihex': 'ihex',
+    '.mem': 'memh',
+    '.memh': 'memh',
+    '.elf': 'elf',
+}
+
+
+def load_image(path, address=0, format=None, **kwargs):
+    """Load a memory image as a list of (address, bytes) segments, the format
+    is guessed from the contents and extension if not given."""
+    if format is None:
+        with open(path, 'rb') as f:
+            head = f.read(4)
+        if b'\x7fELF' == head:
+            format = 'elf'
+        else:
+            format = _EXTENSIONS.get(os.path.splitext(path)[1].lower(), 'bin')
+            if 'ihex' == format and not head.startswith(b':'):
+                format = 'memh'
+    if format not in LOADERS:
+        raise Exception(f"Unknown image format {format}, choose from {', '.join(LOADERS)}")
+    return LOADERS[format](path, address, **kwargs)
@@ -0,0 +1,154 @@
+"""
+
+Copyright (c) 2024 Daxzio
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+import json
+from array import array
+from cocotb import start_soon
+from cocotb.triggers import RisingEdge
+from cocotb.utils import get_sim_time
+
+VALID_ONLY = 0
+READY_ONLY = 1
+HANDSHAKE = 2
+
+
+def _value(signal):
+    try:
+        return int(signal.value)
+    except ValueError:
+        return 0
+
+
+def axi_channels(write=None, read=None):
+    """(name, valid, ready, bytes per beat) for each channel of AXI write/read buses."""
+    channels = []
+    if write is not None:
+        channels.append(('aw', write.aw.awvalid, write.aw.awready, 0))
+        channels.append(('w', write.w.wvalid, write.w.wready, len(write.w.wdata)//8))
+        channels.append(('b', write.b.bvalid, write.b.bready, 0))
+    if read is not None:
+        channels.append(('ar', read.ar.arvalid, read.ar.arready, 0))
+        channels.append(('r', read.r.rvalid, read.r.rready, len(read.r.rdata)//8))
+    return channels
+
+
+def axis_channels(bus):
+    return [('t', bus.tvalid, getattr(bus, 'tready', None), len(bus.tdata)//8)]
+
+
+class BusMetrics:
+    """Per channel valid-only, ready-only and handshake cycle counters.
+
+    All channels of a bus are sampled from one coroutine on the rising
+    edge of clk, the counts are held in a flat integer array. Counts and
+    elapsed time accumulate over every start()/stop() run until clear().
+    """
+
+    def __init__(self, clk, channels):
+        self.clk = clk
+        self.names = [c[0] for c in channels]
+        self.signals = [(c[1], c[2]) for c in channels]
+        self.beat_bytes = [c[3] for c in channels]
+        self.counts = array('Q', bytes(8*3*len(channels)))
+        self.cycles = 0
+        self.t0 = 0.0
+        self._elapsed = 0.0
+        self._monitor_cr = None
+
+    @property
+    def elapsed(self):
+        """Sim time in us spent running."""
+        if self._monitor_cr is None:
+            return self._elapsed
+        return self._elapsed + get_sim_time('us') - self.t0
+
+    def start(self):
+        if self._monitor_cr is None:
+            self.t0 = get_sim_time('us')
+            self._monitor_cr = start_soon(self._monitor())
+
+    def stop(self):
+        if self._monitor_cr is not None:
+            self._elapsed += get_sim_time('us') - self.t0
+            self._monitor_cr.kill()
+            self._monitor_cr = None
+
+    def clear(self):
+        self.counts[:] = array('Q', bytes(8*3*len(self.names)))
+        self.cycles = 0
+        self._elapsed = 0.0
+        self.t0 = get_sim_time('us')
+
+    async def _monitor(self):
+        counts = self.counts
+        signals = list(enumerate(self.signals))
+        while True:
+            await RisingEdge(self.clk)
+            self.cycles += 1
+            for i, (valid, ready) in signals:
+                state = _value(valid) | ((1 if ready is None else _value(ready)) << 1)
+                if state:
+                    counts[3*i + state - 1] += 1
+
+    def channel(self, name):
+        i = self.names.index(name)
+        handshakes = self.counts[3*i + HANDSHAKE]
+        elapsed = self.elapsed
+        nbytes = handshakes * self.beat_bytes[i]
+        return {
+            'valid_only': self.counts[3*i + VALID_ONLY],
+            'ready_only': self.counts[3*i + READY_ONLY],
+            'handshake': handshakes,
+            'beats_per_cycle': handshakes / self.cycles if self.cycles else 0.0,
+            'bytes': nbytes,
+            'bytes_per_us': nbytes / elapsed if elapsed else 0.0,
+        }
+
+    def report(self, path=None):
+        """Dump the counters as JSON, to path if given, and return the string."""
+        result = json.dumps({
+            'cycles': self.cycles,
+            'sim_time_us': self.elapsed,
+            'channels': {name: self.channel(name) for name in self.names},
+        }, indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(result)
+        return result
+
+
+class MetricsMixin:
+    """enable_metrics()/disable_metrics() for a class that provides self.clk
+    and _metrics_channels()."""
+
+    metrics = None
+
+    def enable_metrics(self):
+        if self.metrics is None:
+            self.metrics = BusMetrics(self.clk, self._metrics_channels())
+        self.metrics.start()
+        return self.metrics
+
+    def disable_metrics(self):
+        if self.metrics is not None:
+            self.metrics.stop()
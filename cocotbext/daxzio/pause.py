@@ -0,0 +1,120 @@
+"""
+
+Copyright (c) 2024 Daxzio
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+import itertools
+from functools import lru_cache
+from random import Random
+
+# bit values, lsb first, of every byte
+_BITS = [tuple((b >> k) & 1 for k in range(8)) for b in range(256)]
+_ASCII = bytes.maketrans(b'\x00\x01', b'01')
+
+
+class PausePattern:
+    """Immutable pause pattern held as a packed bit array."""
+
+    __slots__ = ('bits', 'length')
+
+    def __init__(self, values=()):
+        values = bytes(values)
+        self.length = len(values)
+        if self.length:
+            packed = int(values.translate(_ASCII)[::-1], 2)
+            self.bits = packed.to_bytes((self.length+7)//8, 'little')
+        else:
+            self.bits = b''
+
+    def __len__(self):
+        return self.length
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.length
+        if not 0 <= index < self.length:
+            raise IndexError("pause pattern index out of range")
+        return (self.bits[index >> 3] >> (index & 7)) & 1
+
+    def __iter__(self):
+        return itertools.islice(itertools.chain.from_iterable(map(_BITS.__getitem__, self.bits)), self.length)
+
+    def cycle(self):
+        """Repeat the pattern forever, an empty pattern stops straight away."""
+        if not self.length:
+            return iter(())
+        return itertools.chain.from_iterable(itertools.repeat(self))
+
+    @property
+    def duty(self):
+        if not self.length:
+            return 0.0
+        return sum(self) / self.length
+
+
+def _uniform(rng, length=None, ratio=6):
+    # matches the original cycle_pause, pause one cycle in every ratio on average
+    if length is None:
+        length = rng.randint(0, 0xfff)
+    return [1 if 0 == rng.randint(0, ratio-1) else 0 for i in range(length)]
+
+
+def _bursty(rng, length=4096, max_run=32, max_pause=8):
+    values = []
+    while len(values) < length:
+        values.extend([0] * rng.randint(1, max_run))
+        values.extend([1] * rng.randint(1, max_pause))
+    return values[:length]
+
+
+def _duty(rng, period=8, pause=1):
+    return [1] * pause + [0] * (period - pause)
+
+
+def _file(rng, path=None):
+    with open(path, 'rb') as f:
+        text = f.read()
+    return [1 if 0x31 == c else 0 for c in text if c in (0x30, 0x31)]
+
+
+PROFILES = {
+    'uniform': _uniform,
+    'bursty': _bursty,
+    'duty': _duty,
+    'file': _file,
+}
+
+
+def register_profile(name, func):
+    """Add a profile, func(rng, **kwargs) returns a sequence of 0/1 values."""
+    PROFILES[name] = func
+    pause_pattern.cache_clear()
+
+
+@lru_cache(maxsize=256)
+def pause_pattern(profile='uniform', seednum=7, **kwargs):
+    if profile not in PROFILES:
+        raise Exception(f"Unknown pause profile {profile}, choose from {', '.join(PROFILES)}")
+    return PausePattern(PROFILES[profile](Random(seednum), **kwargs))
+
+
+def cycle_pause(seednum=7, profile='uniform', **kwargs):
+    return pause_pattern(profile, seednum, **kwargs).cycle()
@@ -0,0 +1,126 @@
+"""
+
+Copyright (c) 2024 Daxzio
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+from collections import deque
+from .codec import tobuffer, bytelength, first_mismatch
+
+
+class StreamScoreboard:
+    """Compare received frames against a lazily consumed expected stream.
+
+    expected is any iterable of buffers, or of (key, buffer) tuples when a
+    key function is given. key(frame) picks which expectation a received
+    frame is matched against, so frames with different keys can arrive out
+    of order. At most window expectations are held at any time.
+    """
+
+    def __init__(self, expected, window=64, key=None, max_records=32):
+        self.expected = iter(expected)
+        self.window = window
+        self.key = key
+        self.max_records = max_records
+        self.pending = {}
+        self.npending = 0
+        self.nexpected = 0
+        self.exhausted = False
+        self.received = 0
+        self.matched = 0
+        self.mismatched = 0
+        self.unexpected = 0
+        self.records = []
+
+    def _fill(self, want=None):
+        while self.npending < self.window and not self.exhausted:
+            try:
+                item = next(self.expected)
+            except StopIteration:
+                self.exhausted = True
+                break
+            if self.key is None:
+                k, data = None, item
+            else:
+                k, data = item
+            self.pending.setdefault(k, deque()).append((self.nexpected, data))
+            self.nexpected += 1
+            self.npending += 1
+            if k == want:
+                break
+
+    def _record(self, index, k, offset, expected_length, length):
+        if len(self.records) < self.max_records:
+            self.records.append({
+                'frame': self.received - 1,
+                'expected_index': index,
+                'key': k,
+                'offset': offset,
+                'expected_length': expected_length,
+                'length': length,
+            })
+
+    def compare(self, frame):
+        """Check one received frame, returns True if it matched."""
+        data = frame.tdata if hasattr(frame, 'tdata') else frame
+        k = None if self.key is None else self.key(frame)
+        self.received += 1
+        if not self.pending.get(k):
+            self._fill(k)
+        queue = self.pending.get(k)
+        if not queue:
+            self.unexpected += 1
+            self._record(None, k, 0, 0, bytelength(data))
+            return False
+        index, expected = queue.popleft()
+        self.npending -= 1
+        if not queue:
+            del self.pending[k]
+        expected = tobuffer(expected)
+        if expected == data:
+            self.matched += 1
+            return True
+        self.mismatched += 1
+        self._record(index, k, first_mismatch(expected, data), len(expected), bytelength(data))
+        return False
+
+    @property
+    def passed(self):
+        return 0 == self.mismatched and 0 == self.unexpected
+
+    def summary(self):
+        return {
+            'received': self.received,
+            'matched': self.matched,
+            'mismatched': self.mismatched,
+            'unexpected': self.unexpected,
+            'outstanding': self.npending,
+            'exhausted': self.exhausted,
+            'mismatches': list(self.records),
+        }
+
+    def check(self, complete=False):
+        """Raise once with the summary on any mismatch, or any unreceived
+        expectation if complete is set."""
+        if complete:
+            self._fill()
+        if not self.passed or (complete and (self.npending or not self.exhausted)):
+            detail = ", ".join(f"frame {r['frame']} offset {r['offset']}" for r in self.records[:8])
+            raise Exception(f"Scoreboard failed, {self.matched} matched, {self.mismatched} mismatched, {self.unexpected} unexpected, {self.npending} outstanding: {detail}")
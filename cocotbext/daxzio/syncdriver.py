@@ -1,50 +1,171 @@
+from bisect import bisect_right
 from cocotb import start_soon
-from cocotb.triggers import RisingEdge, FallingEdge, Timer
+from cocotb.triggers import Timer
+from cocotb.utils import get_sim_steps, get_sim_time, get_time_from_sim_steps
+
+_PS = {'fs': 0.001, 'ps': 1, 'ns': 1000, 'us': 1000000, 'ms': 1000000000, 'sec': 1000000000000}
 
 class syncDriver:
-    def __init__(self, vsync=None, rsync=None, gsync=None, bsync=None, vsync_freq=60, offset_start=10):
+    """Drive vsync and any number of sync channels from one coroutine.
+
+    Every frame vsync is high for vsync_width ns, then each channel, starting
+    channel_delay + num*channel_spacing ns after vsync falls, gives pulses
+    pulses of pulse_width ns separated by pulse_gap ns. All times are in ns,
+    pulse_width, pulse_gap and channel_delay may be per channel lists.
+
+    With compression above 1 every stretch where all signals are low is
+    shortened by that factor, pulses keep their width and order. Use
+    nominal_time() and frame_position() to map sim time back to the
+    uncompressed frame.
+    """
+    def __init__(self, vsync=None, rsync=None, gsync=None, bsync=None, vsync_freq=60, offset_start=10, channels=None, vsync_width=40000, channel_delay=5000, channel_spacing=None, pulse_width=None, pulse_gap=None, pulses=2, compression=1):
         self.offset_start = offset_start
         self.vsync = vsync
         self.vsync_freq = vsync_freq
         self.vsync_delay = 1000000000/self.vsync_freq
-        #self.vsync.setimmediatevalue(0x0)
-        start_soon(self._vsync())
-        
-        self.rgbsync = [rsync, gsync, bsync]
-
-        self.t0_delay = [5000, 5000, 5000]
-        self.t1_delay = [100000000/self.vsync_freq, 100000000/self.vsync_freq, 100000000/self.vsync_freq]
-        
-        for i, x in enumerate(self.rgbsync):
-            #self.rgbsync[i].setimmediatevalue(0x0)
-            start_soon(self._rgbsync(i))
-        
-    async def _vsync(self):
-        self.vsync.value = 0
-        v0_delay = self.offset_start
-        v1_delay = 500*80
-        v2_delay = round(self.vsync_delay, 3) - v1_delay
-        await Timer(v0_delay, units='ns')
-        while True:
-            self.vsync.value = 1
-            await Timer(v1_delay, units='ns')
-            self.vsync.value = 0
-            await Timer(v2_delay, units='ns')
-
-    async def _rgbsync(self, num=0):
-        self.rgbsync[num].value = 0
-        t0_delay = self.t0_delay[num]
-        t1_delay = round(self.t1_delay[num], 0)
-        t2_delay = round(self.vsync_delay/2 - t1_delay, 3)
-        t0_delay += round(num*(self.vsync_delay/6), 3)
+        self.vsync_width = vsync_width
+        self.pulses = pulses
+        if compression < 1:
+            raise Exception(f"Compression must be at least 1, not {compression}")
+        self.compression = compression
+        self.t_start = None
+
+        self.rgbsync = [x for x in [rsync, gsync, bsync] if x is not None]
+        if channels is not None:
+            self.rgbsync += list(channels)
+        n = len(self.rgbsync)
+
+        if channel_spacing is None:
+            channel_spacing = self.vsync_delay/6
+        if pulse_width is None:
+            pulse_width = round(100000000/self.vsync_freq, 0)
+        self.t0_delay = self._per_channel(channel_delay, n)
+        self.t1_delay = self._per_channel(pulse_width, n)
+        if pulse_gap is None:
+            self.t2_delay = [round(self.vsync_delay/2 - t1, 3) for t1 in self.t1_delay]
+        else:
+            self.t2_delay = self._per_channel(pulse_gap, n)
+        for i in range(n):
+            self.t0_delay[i] += round(i*channel_spacing, 3)
+
+        self.frame = 0
+        self._build_schedule()
+        self.task = start_soon(self._run())
+
+    @staticmethod
+    def _per_channel(val, n):
+        if isinstance(val, (list, tuple)):
+            if not len(val) == n:
+                raise Exception(f"Expected {n} per channel values, got {len(val)}")
+            return list(val)
+        return [val] * n
+
+    @staticmethod
+    def _ps(ns):
+        return int(round(ns*1000))
+
+    def _events(self):
+        """One frame as (time, signal, value), in integer ps from the start of the frame."""
+        self.frame_ps = self._ps(round(self.vsync_delay, 3))
+        events = []
+        if self.vsync is not None:
+            events.append((0, self.vsync, 1))
+            events.append((self._ps(self.vsync_width), self.vsync, 0))
+        for num, sig in enumerate(self.rgbsync):
+            t = self._ps(self.vsync_width) + self._ps(self.t0_delay[num])
+            for i in range(self.pulses):
+                if i:
+                    t += self._ps(self.t2_delay[num])
+                events.append((t, sig, 1))
+                t += self._ps(self.t1_delay[num])
+                events.append((t, sig, 0))
+        events.sort(key=lambda e: e[0])
+        if events and events[-1][0] >= self.frame_ps:
+            raise Exception(f"Sync schedule of {events[-1][0]} ps doesn't fit in a frame of {self.frame_ps} ps")
+        return events
+
+    def _compress(self):
+        # breakpoints of the nominal to compressed time map, one per event
+        # plus the frame end, gaps where every signal is low are scaled down
+        self.nominal = [0]
+        self.compressed = [0]
+        high = set()
+        for t, sig, val in self.events + [(self.frame_ps, None, 0)]:
+            gap = t - self.nominal[-1]
+            if gap:
+                if not high:
+                    gap = int(round(gap/self.compression))
+                self.nominal.append(t)
+                self.compressed.append(self.compressed[-1] + gap)
+            if sig is not None:
+                if val:
+                    high.add(sig)
+                else:
+                    high.discard(sig)
+
+    def _at(self, t):
+        return self.compressed[self.nominal.index(t)]
+
+    def _build_schedule(self):
+        # group simultaneous transitions and convert offsets to sim steps once,
+        # from absolute times so rounding never accumulates within a frame
+        self.events = self._events()
+        self._compress()
+        self.schedule = []
+        last = 0
+        for t, sig, val in self.events:
+            steps = get_sim_steps(self._at(t), 'ps', round_mode='round')
+            if not self.schedule or steps > last:
+                self.schedule.append((steps - last, []))
+                last = steps
+            self.schedule[-1][1].append((sig, val))
+        self.frame_steps = get_sim_steps(self.compressed[-1], 'ps', round_mode='round')
+        self.tail_steps = self.frame_steps - last
+
+    async def _run(self):
+        signals = ([self.vsync] if self.vsync is not None else []) + self.rgbsync
+        for sig in signals:
+            sig.value = 0
+        await Timer(self.offset_start, units='ns')
+        self.t_start = get_sim_time('ps')
+        if not self.schedule:
+            return
         while True:
-            await RisingEdge(self.vsync)
-            await FallingEdge(self.vsync)
-            await Timer(t0_delay, units='ns')
-            for i in range(2):
-                self.rgbsync[num].value = 1
-                await Timer(t1_delay, units='ns')
-                self.rgbsync[num].value = 0
-                if 0 == i:
-                    await Timer(t2_delay, units='ns')
+            for delta, changes in self.schedule:
+                if delta:
+                    await Timer(delta, units='step')
+                for sig, val in changes:
+                    sig.value = val
+            self.frame += 1
+            await Timer(self.tail_steps, units='step')
+
+    @staticmethod
+    def _from_ps(t, units):
+        if 'step' == units:
+            return t/get_time_from_sim_steps(1, 'ps')
+        return t/_PS[units]
+
+    def frame_position(self, time=None, units='ns'):
+        """Frame number and nominal offset into that frame of a sim time,
+        now by default."""
+        if time is None:
+            t = get_sim_time('ps')
+        else:
+            t = time*_PS[units] if not 'step' == units else get_time_from_sim_steps(time, 'ps')
+        if self.t_start is None or t < self.t_start:
+            return (0, 0)
+        frame_c = get_time_from_sim_steps(self.frame_steps, 'ps')
+        frame, c = divmod(t - self.t_start, frame_c)
+        c = c*self.compressed[-1]/frame_c
+        i = min(bisect_right(self.compressed, c), len(self.compressed)-1) - 1
+        n = self.nominal[i] + (c - self.compressed[i])*(self.nominal[i+1] - self.nominal[i])/(self.compressed[i+1] - self.compressed[i])
+        return (int(frame), self._from_ps(n, units))
+
+    def nominal_time(self, time=None, units='ns'):
+        """Time since the first frame started, as it would have been without compression."""
+        frame, offset = self.frame_position(time, units)
+        return self._from_ps(frame*self.frame_ps, units) + offset
+
+    def stop(self):
+        self.task.kill()
 
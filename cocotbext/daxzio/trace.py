@@ -0,0 +1,150 @@
+"""
+
+Copyright (c) 2024 Daxzio
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+import mmap
+import struct
+from collections import namedtuple
+from .codec import tobytes, bytelength, asview
+
+WRITE = 0
+READ = 1
+
+MAGIC = b'DXTR'
+VERSION = 1
+FILE_HEADER = struct.Struct('<4sHH')
+# time, direction, resp, id, address, length, data bytes that follow
+RECORD = struct.Struct('<QBBHQII')
+
+TraceRecord = namedtuple('TraceRecord', ['time', 'direction', 'addr', 'length', 'data', 'resp', 'id'])
+
+
+def _now():
+    from cocotb.utils import get_sim_time
+    return get_sim_time('step')
+
+
+class TraceRecorder:
+    """Packs transactions into a preallocated buffer that is spilled to path
+    each time it fills, and on flush() or close()."""
+
+    def __init__(self, path, buffer_size=1 << 20, clock=_now):
+        self.path = path
+        self.clock = clock
+        self.buffer = bytearray(buffer_size)
+        self.offset = 0
+        self.count = 0
+        self.file = open(path, 'wb')
+        self.file.write(FILE_HEADER.pack(MAGIC, VERSION, RECORD.size))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def record(self, direction, addr=0, data=b'', length=None, resp=0, txid=0):
+        if data is None:
+            data = b''
+        elif isinstance(data, int):
+            data = tobytes(data, length if length is not None else bytelength(data, 1))
+        view = asview(data)
+        n = view.nbytes
+        if length is None:
+            length = n
+        size = RECORD.size + n
+        fields = (self.clock(), direction, resp & 0xff, txid & 0xffff, addr & 0xffffffffffffffff, length, n)
+        self.count += 1
+        if self.offset + size > len(self.buffer):
+            self.flush()
+        if size > len(self.buffer):
+            self.file.write(RECORD.pack(*fields))
+            self.file.write(view)
+            return
+        RECORD.pack_into(self.buffer, self.offset, *fields)
+        start = self.offset + RECORD.size
+        self.buffer[start:start+n] = view
+        self.offset += size
+
+    def flush(self):
+        if self.offset:
+            self.file.write(memoryview(self.buffer)[:self.offset])
+            self.offset = 0
+        self.file.flush()
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class TraceReader:
+    """Memory maps a trace file and iterates its records lazily, the data of
+    each record is a memoryview into the map."""
+
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size = FILE_HEADER.unpack_from(self.mm, 0)
+        if not magic == MAGIC or not record_size == RECORD.size:
+            raise Exception(f"{path} is not a version {VERSION} trace file")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __iter__(self):
+        view = memoryview(self.mm)
+        offset = FILE_HEADER.size
+        end = len(self.mm)
+        while offset + RECORD.size <= end:
+            time, direction, resp, txid, addr, length, n = RECORD.unpack_from(self.mm, offset)
+            start = offset + RECORD.size
+            yield TraceRecord(time, direction, addr, length, view[start:start+n], resp, txid)
+            offset = start + n
+
+    def close(self):
+        # records still referencing the map keep it open until released
+        try:
+            self.mm.close()
+        except BufferError:
+            pass
+        self.file.close()
+
+
+class TraceMixin:
+    """enable_trace()/disable_trace() for the drivers that record their
+    transactions."""
+
+    trace = None
+
+    def enable_trace(self, recorder):
+        """Record every transaction to a TraceRecorder."""
+        self.trace = recorder
+        return recorder
+
+    def disable_trace(self):
+        trace = self.trace
+        self.trace = None
+        return trace
@@ -1,12 +1,26 @@
-import logging
-from cocotb.triggers import RisingEdge
+from cocotb import start_soon
+from cocotb.triggers import RisingEdge, FallingEdge, ClockCycles
 from cocotbext.uart import UartSource, UartSink
 from reue.interfaces.reue import Reue
+from .cocotbext_logger import CocoTBExtLogger
+from .trace import TraceMixin, READ, WRITE
 
-class UartBypass:
+class UartCommand:
+    __slots__ = ('direction', 'addr', 'data', 'txdata', 'rxlength', 'result')
+
+    def __init__(self, direction, addr, data, txdata, rxlength):
+        self.direction = direction
+        self.addr = addr
+        self.data = data
+        self.txdata = txdata
+        self.rxlength = rxlength
+        self.result = None
+
+
+class UartBypass(TraceMixin, CocoTBExtLogger):
     
     def __init__(self, dut, clk, uart_in=None, uart_out=None, baud=230400):
-        self.log = logging.getLogger(f"cocotb.UartBypass")
+        CocoTBExtLogger.__init__(self, type(self).__name__, enable=False)
         self.clk = clk
         self.baud = int(baud)
         self.uart_disable = dut.uart_disable
@@ -16,13 +30,16 @@ class UartBypass:
         self.rfifo_dout = dut.rfifo_dout
         self.rfifo_empty = dut.rfifo_empty
         self.rfifo_full = dut.rfifo_full
+        self.wfifo_full = getattr(dut, 'wfifo_full', None)
 
         self.uart_disable.setimmediatevalue(0)
         self.wfifo_wr_en.setimmediatevalue(0)
         self.wfifo_din.setimmediatevalue(0)
         self.rfifo_rd_en.setimmediatevalue(0)
-        self.enable_logging()
         self.fake_delay = 8
+        self.burst = False
+        self.commands = []
+        self.trace = None
 
 
         if uart_in is None:
@@ -34,12 +51,6 @@ class UartBypass:
         
         self.reue = Reue()
 
-    def enable_logging(self):
-        self.log.setLevel(logging.DEBUG)
-    
-    def disable_logging(self):
-        self.log.setLevel(logging.WARNING)
-    
     @property
     def bytes(self):
         return self.reue.bytes
@@ -66,6 +77,16 @@ class UartBypass:
     def gen_read(self, *args, **kwargs):
         return self.reue.gen_read(*args, **kwargs)
 
+    def enable_burst(self):
+        """In FIFO bypass mode move a byte every clock cycle, throttled only
+        by wfifo_full and rfifo_full on transmit and rfifo_empty on receive."""
+        if self.wfifo_full is None:
+            self.log.warning("No wfifo_full on the DUT, burst transmit has no flow control and can overflow the write FIFO")
+        self.burst = True
+
+    def disable_burst(self):
+        self.burst = False
+
     async def disable_uart(self):
         await RisingEdge(self.clk)
         self.uart_disable.value = 1
@@ -76,12 +97,14 @@ class UartBypass:
         self.uart_disable.value = 0
         await RisingEdge(self.clk)
 
-    async def tx_bytes(self):
+    async def tx_bytes(self, data=None):
         if 0 == self.uart_disable.value:
-            await self.uart_source.write(self.bytearray)
+            await self.uart_source.write(self.bytearray if data is None else data)
             await self.uart_source.wait()
+        elif self.burst:
+            await self._tx_burst(self.bytes if data is None else data)
         else:
-            for x in self.bytes:
+            for x in (self.bytes if data is None else data):
                 await RisingEdge(self.clk)
                 #self.log.debug(f"0x{x:02x}")
                 self.wfifo_wr_en.value = 1
@@ -89,8 +112,47 @@ class UartBypass:
                 await RisingEdge(self.clk)
                 self.wfifo_wr_en.value = 0
                 self.wfifo_din.value = 0
-                for i in range(self.fake_delay):
-                    await RisingEdge(self.clk)
+                if self.fake_delay:
+                    await ClockCycles(self.clk, self.fake_delay)
+
+    async def _tx_burst(self, data):
+        await RisingEdge(self.clk)
+        self.wfifo_wr_en.value = 1
+        i = 0
+        while i < len(data):
+            self.wfifo_din.value = data[i]
+            await RisingEdge(self.clk)
+            # the byte was only taken if the fifo was not full at this edge
+            if self.wfifo_full is None or 0 == self.wfifo_full.value:
+                i += 1
+            # with no room for responses the DUT stalls, hold off until it drains
+            if 1 == self.rfifo_full.value and i < len(data):
+                self.wfifo_wr_en.value = 0
+                await FallingEdge(self.rfifo_full)
+                await RisingEdge(self.clk)
+                self.wfifo_wr_en.value = 1
+        self.wfifo_wr_en.value = 0
+        self.wfifo_din.value = 0
+
+    async def _rx_burst(self, count):
+        received = bytearray()
+        while True:
+            if 1 == self.rfifo_empty.value:
+                if len(received) >= count:
+                    break
+                await FallingEdge(self.rfifo_empty)
+            self.rfifo_rd_en.value = 1
+            reading = False
+            while True:
+                await RisingEdge(self.clk)
+                if reading:
+                    received.append(int(self.rfifo_dout.value))
+                # a byte was popped at this edge if the fifo was not empty
+                reading = 0 == self.rfifo_empty.value
+                if not reading:
+                    break
+            self.rfifo_rd_en.value = 0
+        return received
     
     async def rx_bytes(self):
         if 0 == len(self.return_bytes):
@@ -102,6 +164,9 @@ class UartBypass:
                 data = await self.uart_sink.read()
                 #self.log.debug(data)
                 self.returned_val |= (int.from_bytes(data) << (8*j))
+        elif self.burst:
+            self.returned_bytes = await self._rx_burst(len(self.return_bytes))
+            self.returned_val = int.from_bytes(self.returned_bytes, 'little')
         else:
             while 1 == self.rfifo_empty.value:
                 await RisingEdge(self.clk)
@@ -112,21 +177,85 @@ class UartBypass:
                 self.rfifo_rd_en.value = 0
                 await RisingEdge(self.clk)
                 self.returned_val |= (self.rfifo_dout.value << (8*j))
-                for i in range(self.fake_delay):
-                    await RisingEdge(self.clk)
+                if self.fake_delay:
+                    await ClockCycles(self.clk, self.fake_delay)
                 j += 1
     
     async def write(self, addr, data, length=None):
-        self.log.debug(f"Write 0x{addr:08x}: 0x{data:08x}")
+        if self.debug_enabled:
+            self.log.debug("Write 0x%08x: 0x%08x", addr, data)
         self.gen_write(addr, data, length)
         await self.tx_bytes()
         await self.rx_bytes()
+        if self.trace is not None:
+            self.trace.record(WRITE, addr, data)
 
     async def read(self, addr, data=None, length=None):
         self.gen_read(addr, data, length)
         await self.tx_bytes()
         await self.rx_bytes()
+        if self.trace is not None:
+            self.trace.record(READ, addr, self.returned_val)
             
-        self.log.debug(f"Read  0x{addr:08x}: 0x{self.returned_val:08x}")
+        if self.debug_enabled:
+            self.log.debug("Read  0x%08x: 0x%08x", addr, self.returned_val)
         if not self.returned_val == self.data and not None == self.data:
             raise Exception(f"Expected 0x{self.data:08x} doesn't match returned 0x{self.returned_val:08x}")
+
+    def queue_write(self, addr, data, length=None):
+        """Encode a write now and send it with the rest of the queue on run_queue()."""
+        self.gen_write(addr, data, length)
+        self.commands.append(UartCommand(WRITE, addr, data, bytes(self.bytearray), len(self.return_bytes)))
+        return self.commands[-1]
+
+    def queue_read(self, addr, data=None, length=None):
+        """Encode a read now, its result is filled in by run_queue()."""
+        self.gen_read(addr, data, length)
+        self.commands.append(UartCommand(READ, addr, self.data, bytes(self.bytearray), len(self.return_bytes)))
+        return self.commands[-1]
+
+    async def _rx_uart(self, count):
+        received = bytearray()
+        while len(received) < count:
+            received.extend(await self.uart_sink.read(count - len(received)))
+        return received
+
+    async def _rx_commands(self, commands):
+        for cmd in commands:
+            if cmd.rxlength:
+                cmd.result = int.from_bytes(await self._rx_uart(cmd.rxlength), 'little')
+
+    async def run_queue(self):
+        """Send every queued command as one transmit buffer and match the
+        responses back to them as they arrive, returns the list of results."""
+        commands, self.commands = self.commands, []
+        txdata = b''.join(cmd.txdata for cmd in commands)
+        if 0 == self.uart_disable.value:
+            rx = start_soon(self._rx_commands(commands))
+            await self.tx_bytes(txdata)
+            await rx
+        else:
+            # drain responses while still transmitting so the read fifo never fills
+            rx = start_soon(self._rx_burst(sum(cmd.rxlength for cmd in commands)))
+            await self.tx_bytes(txdata)
+            received = memoryview(await rx)
+            offset = 0
+            for cmd in commands:
+                if cmd.rxlength:
+                    cmd.result = int.from_bytes(received[offset:offset+cmd.rxlength], 'little')
+                    offset += cmd.rxlength
+        mismatches = []
+        for cmd in commands:
+            if READ == cmd.direction:
+                if self.debug_enabled:
+                    self.log.debug("Read  0x%08x: 0x%08x", cmd.addr, cmd.result)
+                if not cmd.result == cmd.data and not None == cmd.data:
+                    mismatches.append(cmd)
+            elif self.debug_enabled:
+                self.log.debug("Write 0x%08x: 0x%08x", cmd.addr, cmd.data)
+            if self.trace is not None:
+                self.trace.record(cmd.direction, cmd.addr, cmd.result if READ == cmd.direction else cmd.data)
+        if mismatches:
+            detail = ", ".join(f"0x{cmd.addr:08x}: expected 0x{cmd.data:08x} returned 0x{cmd.result:08x}" for cmd in mismatches[:8])
+            raise Exception(f"{len(mismatches)} of {len(commands)} queued commands mismatched, {detail}")
+        return [cmd.result for cmd in commands]
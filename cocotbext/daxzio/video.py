@@ -0,0 +1,141 @@
+"""
+
+Copyright (c) 2024 Daxzio
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in
+all copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+THE SOFTWARE.
+
+"""
+import os
+import mmap
+from cocotb import start_soon
+from cocotb.triggers import RisingEdge, Timer
+from cocotb.utils import get_sim_steps, get_sim_time
+from .cocotbext_logger import CocoTBExtLogger
+from .codec import asview, chunks, isbuffer
+
+
+class VideoSource(CocoTBExtLogger):
+    """Stream video frames through an AxiStreamDriver, one AXI stream frame
+    per line so tlast marks the end of every line, with tuser set on the
+    first beat of each video frame.
+
+    frames may be a raw video file, which is memory mapped, a buffer such as
+    a NumPy array holding one or more frames, or an iterable of frame
+    buffers. Pixels are sent as the bytes of the buffer, pixel_bytes each,
+    and lines are cut out lazily as they are sent.
+
+    Frames are paced by fps, or by the rising edge of vsync from a
+    syncDriver, or sent back to back if neither is given.
+    """
+
+    def __init__(self, driver, width, height, pixel_bytes=4, fps=None, sync=None, depth=None):
+        CocoTBExtLogger.__init__(self, type(self).__name__, enable=False)
+        self.driver = driver
+        self.width = width
+        self.height = height
+        self.pixel_bytes = pixel_bytes
+        self.line_bytes = width*pixel_bytes
+        self.frame_bytes = self.line_bytes*height
+        self.fps = fps
+        self.sync = sync
+        self.depth = 2*height if depth is None else depth
+        self.frames = 0
+        self.late_frames = 0
+        self.task = None
+
+        beat_bytes = driver.tdata_length//8
+        if hasattr(driver.axis_source.bus, 'tuser'):
+            # tuser is given per byte, mark the whole first beat of the line
+            self.sof_user = [1]*min(beat_bytes, self.line_bytes) + [0]*max(self.line_bytes-beat_bytes, 0)
+        else:
+            self.sof_user = None
+
+    def _split(self, buf):
+        view = asview(buf)
+        if view.nbytes % self.frame_bytes:
+            raise Exception(f"Buffer of {view.nbytes} bytes isn't a whole number of {self.width}x{self.height} frames")
+        for i in range(0, view.nbytes, self.frame_bytes):
+            yield view[i:i+self.frame_bytes]
+
+    def _file_frames(self, path):
+        with open(path, 'rb') as f:
+            if 0 == os.fstat(f.fileno()).st_size:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if len(mm) % self.frame_bytes:
+                    raise Exception(f"{path} isn't a whole number of {self.width}x{self.height} frames")
+                for i in range(0, len(mm), self.frame_bytes):
+                    yield mm[i:i+self.frame_bytes]
+
+    def _frames(self, frames):
+        if isinstance(frames, (str, os.PathLike)):
+            yield from self._file_frames(frames)
+        elif isbuffer(frames):
+            yield from self._split(frames)
+        else:
+            for frame in frames:
+                yield from self._split(frame)
+
+    async def _pace(self, index):
+        if self.sync is not None:
+            await RisingEdge(self.sync.vsync)
+        elif self.fps is not None:
+            if 0 == index:
+                self.t0 = get_sim_time('step')
+                return
+            target = self.t0 + index*self.frame_steps
+            now = get_sim_time('step')
+            if target > now:
+                await Timer(target - now, 'step')
+            else:
+                self.late_frames += 1
+                self.log.warning("Frame %d started %d steps late", index, now - target)
+
+    async def _lines(self, frames, count):
+        for index, frame in enumerate(self._frames(frames)):
+            if count is not None and index >= count:
+                break
+            await self._pace(index)
+            for line in chunks(frame, self.line_bytes):
+                yield line
+            self.frames += 1
+
+    def _tuser(self, index, buf):
+        return self.sof_user if 0 == index % self.height else 0
+
+    async def send(self, frames, count=None):
+        """Send up to count frames, returns the number of frames sent."""
+        if self.fps is not None:
+            self.frame_steps = get_sim_steps(1/self.fps, 'sec', round_mode='round')
+        self.frames = 0
+        kwargs = {}
+        if self.sof_user is not None:
+            kwargs['tuser'] = self._tuser
+        await self.driver.stream(self._lines(frames, count), depth=self.depth, **kwargs)
+        self.log.info(f"Sent {self.frames} frames of {self.width}x{self.height}")
+        return self.frames
+
+    def start(self, frames, count=None):
+        self.task = start_soon(self.send(frames, count))
+        return self.task
+
+    def stop(self):
+        if self.task is not None:
+            self.task.kill()
+            self.task = None
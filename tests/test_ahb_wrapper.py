@@ -0,0 +1,84 @@
+import asyncio
+from array import array
+from types import SimpleNamespace
+import pytest
+import cocotb
+
+pytest.importorskip('cocotbext.ahb')
+
+from cocotbext.ahb import AHBTxn
+from cocotbext.ahb.ahb_types import AHBSize, AHBWrite, AHBResp
+import cocotbext.daxzio.ahb_wrapper as ahb_wrapper
+from cocotbext.daxzio.ahb_wrapper import AHBMonitorDX, AHBLiteMasterDX
+
+
+def _no_task(coro):
+    coro.close()
+    return SimpleNamespace(kill=lambda: None)
+
+
+def _monitor(monkeypatch):
+    monkeypatch.setattr(cocotb, 'start_soon', _no_task)
+    monkeypatch.setattr(ahb_wrapper, 'start_soon', _no_task)
+    bus = SimpleNamespace(entity=SimpleNamespace(_name='dut'))
+    return AHBMonitorDX(bus, None, None, prefix='ahb')
+
+
+def _txn(addr, write):
+    mode = AHBWrite.WRITE if write else AHBWrite.READ
+    return AHBTxn(addr, AHBSize.WORD, mode, AHBResp.OKAY, 0x11, 0x22)
+
+
+def test_recv_queue_and_subscribers(monkeypatch):
+    mon = _monitor(monkeypatch)
+    mon.set_regions([('regs', 0x1000, 0x100)])
+    queue = mon.subscribe(maxsize=1)
+    mon._recv(_txn(0x1004, True))
+    mon._recv(_txn(0x2000, False))
+    # with no user callback the base class still queues every transaction
+    assert 2 == len(mon)
+    assert 0x1004 == mon[0].addr
+    assert 0x2000 == mon.txn.addr and mon.txn_receive
+    assert 1 == queue.qsize() and 1 == mon.dropped
+    assert {'regs': {'read': 0, 'write': 1}, 'other': 1} == mon.coverage()
+
+    seen = []
+    mon.add_callback(seen.append)
+    mon._recv(_txn(0x1008, False))
+    assert 1 == len(seen) and 2 == len(mon)
+    assert {'read': 1, 'write': 1} == mon.coverage()['regs']
+
+
+def test_subscribe_bounded_by_default(monkeypatch):
+    mon = _monitor(monkeypatch)
+    assert 0 < mon.subscribe().maxsize
+
+
+def test_prepare_addresses():
+    mst = AHBLiteMasterDX.__new__(AHBLiteMasterDX)
+    mst.prepare_addresses(0x100, 0x0807060504030201, 2)
+    assert [0x100, 0x104] == mst.addresses
+    assert [0x04030201, 0x08070605] == mst.values
+    mst.prepare_addresses(0x100, -1, 3)
+    assert [0x100, 0x104, 0x108] == mst.addresses
+    assert [-1, -1, -1] == mst.values
+    mst.prepare_addresses([0x10, 0x20], [1, 2])
+    assert [0x10, 0x20] == mst.addresses
+    assert [1, 2] == mst.values
+
+
+def test_verify_block_offsets():
+    mst = AHBLiteMasterDX.__new__(AHBLiteMasterDX)
+    returned = array('I', range(16))
+    returned[3] = 0xdead
+    returned[15] = 0xbeef
+
+    async def read_block(address, length, **kwargs):
+        return returned[:length]
+    mst.read_block = read_block
+
+    expected = b''.join(i.to_bytes(4, 'little') for i in range(16))
+    assert [12, 60] == asyncio.run(mst.verify_block(0x1000, expected, raise_error=False))
+    assert [] == asyncio.run(mst.verify_block(0x1000, list(range(3))))
+    with pytest.raises(Exception, match='2 of 16 words mismatched, 0x0000100c: expected 0x00000003 returned 0x0000dead'):
+        asyncio.run(mst.verify_block(0x1000, expected))
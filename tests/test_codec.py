@@ -0,0 +1,80 @@
+import sys
+from array import array
+from random import Random
+
+import pytest
+
+from cocotbext.daxzio import codec
+from cocotbext.daxzio.codec import first_mismatch, mismatch_ranges, towords, tobytes, tointeger, bytelength
+
+
+@pytest.fixture(params=['numpy', 'python'])
+def backend(request, monkeypatch):
+    if 'python' == request.param:
+        monkeypatch.setattr(codec, 'np', None)
+    elif codec.np is None:
+        pytest.skip('numpy not installed')
+    return request.param
+
+
+def flip(data, offsets):
+    data = bytearray(data)
+    for i in offsets:
+        data[i] ^= 0xff
+    return data
+
+
+def test_tobytes_tointeger():
+    assert b'\x78\x56\x34\x12' == tobytes(0x12345678)
+    assert b'\xff\xff' == tobytes(-1, 2)
+    assert 0x12345678 == tointeger(b'\x78\x56\x34\x12')
+    assert 0x0201 == tointeger([1, 2])
+    assert 8 == bytelength(0x1_0000_0000)
+    assert 4 == bytelength(0)
+    assert 3 == bytelength(b'abc')
+
+
+def test_first_mismatch():
+    data = bytes(range(256)) * 16
+    assert -1 == first_mismatch(data, bytearray(data))
+    for i in [0, 1, 2047, 4095]:
+        assert i == first_mismatch(data, flip(data, [i]))
+    assert 3 == first_mismatch(data, flip(data, [3, 2000, 4095]))
+    assert 100 == first_mismatch(data[:100], data)
+    assert 100 == first_mismatch(data, data[:100])
+
+
+def test_towords():
+    words = towords(bytes(range(8)))
+    assert 'I' == words.typecode
+    assert [0x03020100, 0x07060504] == words.tolist()
+    assert [0x03020100, 0x0504] == towords(bytes(range(6))).tolist()
+    assert [] == towords(b'').tolist()
+
+
+def test_towords_byteorder(monkeypatch):
+    monkeypatch.setattr(sys, 'byteorder', 'big' if 'little' == sys.byteorder else 'little')
+    words = towords(bytes(range(4)))
+    words.byteswap()
+    assert [0x03020100] == words.tolist()
+
+
+def test_mismatch_ranges(backend):
+    data = Random(1).randbytes(20000)
+    assert [] == mismatch_ranges(data, bytearray(data))
+    other = flip(data, [0, 1, 2, 4095, 4096, 9000, 19999])
+    assert [(0, 3), (4095, 4097), (9000, 9001), (19999, 20000)] == mismatch_ranges(data, other)
+
+
+def test_mismatch_ranges_length(backend):
+    data = bytes(64)
+    assert [(60, 64)] == mismatch_ranges(data, data[:60])
+    assert [(59, 64)] == mismatch_ranges(data, flip(data[:60], [59]))
+    assert [(0, 4)] == mismatch_ranges(b'', data[:4])
+
+
+def test_mismatch_ranges_views(backend):
+    words = array('I', range(1024))
+    other = array('I', words)
+    other[10] = 0
+    assert [(40, 41)] == mismatch_ranges(words, other)
@@ -0,0 +1,38 @@
+import pytest
+from cocotbext.daxzio.detect_clk import ClockStats
+
+
+def test_empty():
+    stats = ClockStats('clk')
+    assert stats.freq is None and stats.duty is None
+    assert (None, None) == stats.jitter
+    assert 0 == stats.asdict()['samples']
+
+
+def test_stats():
+    stats = ClockStats('clk', expected=100)
+    # periods in ps, 10 ns +/- 100 ps
+    for period, high in [(10000, 5000), (9900, 4950), (10100, 5050), (10000, 4000)]:
+        stats.add(period, high)
+    assert 4 == stats.count
+    assert pytest.approx(100) == stats.freq
+    assert pytest.approx(1000000/10100) == stats.min_freq
+    assert pytest.approx(1000000/9900) == stats.max_freq
+    assert pytest.approx(0.475) == stats.duty
+    pp, rms = stats.jitter
+    assert 200 == pp
+    assert pytest.approx((2*100**2/4)**0.5) == rms
+    result = stats.asdict()
+    assert 200 == result['jitter_pp']
+    assert 0 == result['stops']
+
+
+def test_clear():
+    stats = ClockStats('clk')
+    stats.add(10000, 5000)
+    stats.stops = 1
+    stats.clear()
+    assert 0 == stats.count and 0 == stats.stops
+    stats.add(4000, 2000)
+    assert pytest.approx(250) == stats.freq
+    assert (0, 0.0) == stats.jitter
@@ -0,0 +1,59 @@
+import json
+import cocotbext.daxzio.latency as latency
+from cocotbext.daxzio.latency import LatencyHistogram, LatencyTracker
+
+
+def test_histogram_percentile():
+    hist = LatencyHistogram()
+    assert 0 == hist.percentile(50)
+    for steps in [1, 2, 3, 100, 100, 100, 100, 100, 100, 5000]:
+        hist.add(steps)
+    assert 10 == hist.count
+    assert 5000 == hist.max
+    # bucket upper bounds, capped at the largest sample
+    assert 3 == hist.percentile(30)
+    assert 127 == hist.percentile(50)
+    assert 127 == hist.percentile(90)
+    assert 5000 == hist.percentile(99)
+    assert 5000 == hist.percentile(100)
+
+
+def test_histogram_merge():
+    a = LatencyHistogram()
+    b = LatencyHistogram()
+    a.add(10, count=3)
+    b.add(1000)
+    a.merge(b)
+    assert 4 == a.count
+    assert 1030 == a.total
+    assert 1000 == a.max
+
+
+def test_record_count(monkeypatch):
+    monkeypatch.setattr(latency, 'get_time_from_sim_steps', lambda steps, units: steps/1000)
+    tracker = LatencyTracker([('regs', 0x1000, 0x100), ('mem', 0x8000, 0x8000)], units='ns')
+    # a block of 8 words taking 800 steps is 8 transfers of 100 steps
+    tracker.record('write', 0x8000, 200, 1000, count=8)
+    tracker.record('read', 0x1010, 0, 50)
+    tracker.record('read', 0x4000, 0, 70)
+    mem = tracker.histogram('mem', 'write')
+    assert 8 == mem.count and 800 == mem.total and 100 == mem.max
+    assert 1 == tracker.histogram('other').count
+    assert 2 == tracker.histogram(direction='read').count
+    stats = tracker.stats('mem')
+    assert 8 == stats['count']
+    assert 0.1 == stats['mean']
+    assert 0.1 == stats['max']
+    exported = json.loads(tracker.export())
+    assert 'ns' == exported['units']
+    assert {('mem', 'write'), ('regs', 'read'), ('other', 'read')} == {(h['region'], h['direction']) for h in exported['histograms']}
+
+
+def test_mixin():
+    drv = latency.LatencyMixin()
+    assert drv.latency is None
+    tracker = drv.enable_latency(units='us')
+    assert tracker is drv.enable_latency()
+    assert 'us' == tracker.units
+    assert tracker is drv.disable_latency()
+    assert drv.latency is None
@@ -0,0 +1,29 @@
+import logging
+from cocotbext.daxzio.cocotbext_logger import CocoTBExtLogger, buffer_log, flush_log, unbuffer_log
+
+
+def test_logging_off_by_default():
+    drv = CocoTBExtLogger('test_default')
+    assert logging.NOTSET == drv.log.level
+    drv.enable_logging()
+    assert drv.debug_enabled
+    drv.disable_logging()
+    assert not drv.debug_enabled
+
+
+def test_buffer_flush(caplog):
+    log = logging.getLogger('cocotb.test_buffer')
+    log.setLevel(logging.INFO)
+    caplog.set_level(logging.INFO)
+    handler = buffer_log(log, capacity=100)
+    assert buffer_log(log) is handler
+    log.info('held')
+    assert 'held' not in caplog.text
+    flush_log(log)
+    assert 'held' in caplog.text
+    log.error('at once')
+    assert 'at once' in caplog.text
+    log.info('on unbuffer')
+    unbuffer_log(log)
+    assert 'on unbuffer' in caplog.text
+    assert log.propagate and not log.handlers
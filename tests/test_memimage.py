@@ -0,0 +1,129 @@
+import struct
+
+import pytest
+
+from cocotbext.daxzio.memimage import PT_LOAD, load_bin, load_ihex, load_memh, load_elf, load_image, random_buffer
+
+
+def ihex_record(rtype, offset, data):
+    record = bytes([len(data), offset >> 8, offset & 0xff, rtype]) + data
+    return ':' + (record + bytes([-sum(record) & 0xff])).hex().upper()
+
+
+def make_elf(bits, endian, segments):
+    """segments is a list of (p_type, p_paddr, data, p_memsz)."""
+    e = '<' if 'little' == endian else '>'
+    ident = b'\x7fELF' + bytes([2 if 64 == bits else 1, 1 if 'little' == endian else 2, 1]) + bytes(9)
+    if 64 == bits:
+        header = struct.Struct(e + '16sHHIQQQIHHHHHH')
+        phdr = struct.Struct(e + 'IIQQQQQQ')
+    else:
+        header = struct.Struct(e + '16sHHIIIIIHHHHHH')
+        phdr = struct.Struct(e + 'IIIIIIII')
+    phoff = header.size
+    offset = phoff + phdr.size*len(segments)
+    table = b''
+    body = b''
+    for p_type, paddr, data, memsz in segments:
+        if 64 == bits:
+            table += phdr.pack(p_type, 5, offset, paddr + 0x1000, paddr, len(data), memsz, 4)
+        else:
+            table += phdr.pack(p_type, offset, paddr + 0x1000, paddr, len(data), memsz, 5, 4)
+        body += data
+        offset += len(data)
+    return header.pack(ident, 2, 0xf3, 1, 0, phoff, 0, 0, header.size, phdr.size, len(segments), 0, 0, 0) + table + body
+
+
+def test_random_buffer_is_seeded():
+    assert random_buffer(64, 5) == random_buffer(64, 5)
+    assert not random_buffer(64, 5) == random_buffer(64, 6)
+    assert 64 == len(random_buffer(64, 5))
+    assert b'' == random_buffer(0, 5)
+
+
+def test_bin(tmp_path):
+    path = tmp_path / 'image.bin'
+    path.write_bytes(b'\x01\x02\x03')
+    assert [(0x100, b'\x01\x02\x03')] == load_bin(path, 0x100)
+    assert [(0, b'\x01\x02\x03')] == load_image(str(path))
+
+
+def test_ihex(tmp_path):
+    path = tmp_path / 'image.hex'
+    path.write_text('\n'.join([
+        ihex_record(0x00, 0x0000, b'\x01\x02\x03\x04'),
+        ihex_record(0x00, 0x0004, b'\x05\x06'),
+        ihex_record(0x04, 0x0000, b'\x00\x0a'),
+        ihex_record(0x00, 0x0010, b'\x55\xaa'),
+        ihex_record(0x02, 0x0000, b'\x10\x00'),
+        ihex_record(0x00, 0x0000, b'\x77'),
+        ihex_record(0x01, 0x0000, b''),
+        ihex_record(0x00, 0x0000, b'\xff'),
+    ]) + '\n')
+    assert [
+        (0x100, b'\x01\x02\x03\x04\x05\x06'),
+        (0x10100, b'\x77'),
+        (0xa0110, b'\x55\xaa'),
+    ] == load_image(str(path), 0x100)
+
+
+def test_ihex_bad_checksum(tmp_path):
+    path = tmp_path / 'image.hex'
+    path.write_text(ihex_record(0x00, 0, b'\x01')[:-2] + '00\n')
+    with pytest.raises(Exception, match='checksum'):
+        load_ihex(path)
+
+
+def test_memh_words(tmp_path):
+    path = tmp_path / 'image.mem'
+    path.write_text('// comment\ndeadbeef 0123_4567\n@4 cafef00d\n')
+    assert [(0, bytes.fromhex('efbeadde67452301')), (16, bytes.fromhex('0df0feca'))] == load_image(str(path))
+
+
+def test_memh_leading_address(tmp_path):
+    path = tmp_path / 'image.mem'
+    path.write_text('@00000010\ndeadbeef 01020304\n')
+    assert [(0x40, bytes.fromhex('efbeadde04030201'))] == load_memh(path)
+
+
+def test_memh_objcopy_bytes(tmp_path):
+    path = tmp_path / 'image.mem'
+    path.write_text('@00000100\n01 02 03 04\n@00000200\nAA BB\n')
+    assert [(0x100, b'\x01\x02\x03\x04'), (0x200, b'\xaa\xbb')] == load_memh(path)
+    assert [(0x200, bytes([1, 0, 2, 0, 3, 0, 4, 0])), (0x400, bytes([0xaa, 0, 0xbb, 0]))] == load_memh(path, width=2)
+
+
+def test_memh_word_too_wide(tmp_path):
+    path = tmp_path / 'image.mem'
+    path.write_text('deadbeef\n')
+    with pytest.raises(Exception, match='wider'):
+        load_memh(path, width=2)
+
+
+@pytest.mark.parametrize('bits', [32, 64])
+@pytest.mark.parametrize('endian', ['little', 'big'])
+def test_elf(tmp_path, bits, endian):
+    path = tmp_path / 'image.elf'
+    path.write_bytes(make_elf(bits, endian, [
+        (PT_LOAD, 0x8000, b'\x13\x00\x00\x00', 8),
+        (4, 0x9000, b'note', 4),
+        (PT_LOAD, 0xa000, b'\xaa\xbb', 2),
+        (PT_LOAD, 0xb000, b'', 0),
+    ]))
+    expected = [(0x8000, b'\x13\x00\x00\x00' + bytes(4)), (0xa000, b'\xaa\xbb')]
+    assert expected == load_elf(path)
+    assert [(a + 0x10, d) for a, d in expected] == load_image(str(path), 0x10)
+
+
+def test_not_elf(tmp_path):
+    path = tmp_path / 'image.elf'
+    path.write_bytes(b'\x00' * 64)
+    with pytest.raises(Exception, match='not an ELF'):
+        load_elf(path)
+
+
+def test_unknown_format(tmp_path):
+    path = tmp_path / 'image.bin'
+    path.write_bytes(b'\x00')
+    with pytest.raises(Exception, match='Unknown image format'):
+        load_image(str(path), format='srec')
@@ -0,0 +1,67 @@
+import itertools
+from random import randint, seed
+
+import pytest
+
+from cocotbext.daxzio.pause import PausePattern, cycle_pause, pause_pattern, register_profile, PROFILES
+
+
+def legacy_cycle_pause(seednum=7):
+    # the original implementation from axi_driver.py
+    seed(seednum)
+    length = randint(0, 0xfff)
+    array = []
+    for i in range(length):
+        x = randint(0, 5)
+        if 0 == x:
+            array.append(1)
+        else:
+            array.append(0)
+    return itertools.cycle(array)
+
+
+@pytest.mark.parametrize('seednum', [0, 1, 7, 1234, 0xffffff])
+def test_uniform_matches_legacy(seednum):
+    length = len(pause_pattern('uniform', seednum))
+    n = 3*length + 5
+    assert list(itertools.islice(legacy_cycle_pause(seednum), n)) == list(itertools.islice(cycle_pause(seednum), n))
+
+
+def test_pattern_bits():
+    values = [1, 0, 0, 1, 1, 0, 1, 0, 1]
+    pattern = PausePattern(values)
+    assert 9 == len(pattern)
+    assert values == list(pattern)
+    assert 1 == pattern[-1]
+    assert 5/9 == pattern.duty
+    with pytest.raises(IndexError):
+        pattern[9]
+    assert [] == list(PausePattern().cycle())
+
+
+def test_duty_profile():
+    assert [1, 0, 0, 0] * 2 == list(itertools.islice(cycle_pause(profile='duty', period=4), 8))
+
+
+def test_bursty_profile():
+    pattern = pause_pattern('bursty', 3, length=1000, max_run=4, max_pause=2)
+    assert 1000 == len(pattern)
+    assert pattern == pause_pattern('bursty', 3, length=1000, max_run=4, max_pause=2)
+    runs = [len(list(g)) for v, g in itertools.groupby(pattern) if v]
+    assert max(runs) <= 2
+
+
+def test_file_profile(tmp_path):
+    path = tmp_path / 'pause.txt'
+    path.write_text('0 1 1\n0x')
+    assert [0, 1, 1, 0] == list(pause_pattern('file', path=str(path)))
+
+
+def test_register_profile():
+    register_profile('ones', lambda rng, length=3: [1] * length)
+    try:
+        assert [1, 1, 1] == list(pause_pattern('ones'))
+    finally:
+        del PROFILES['ones']
+    with pytest.raises(Exception, match='Unknown pause profile'):
+        pause_pattern('missing')
@@ -0,0 +1,58 @@
+from collections import namedtuple
+
+import pytest
+
+from cocotbext.daxzio.scoreboard import StreamScoreboard
+
+Frame = namedtuple('Frame', ['tdata', 'tid'])
+
+
+def test_in_order():
+    sb = StreamScoreboard([b'abc', bytearray(b'def')])
+    assert sb.compare(b'abc')
+    assert sb.compare(Frame(b'def', 0))
+    sb.check(complete=True)
+    assert sb.passed
+
+
+def test_keyed_out_of_order():
+    expected = [(0, b'a0'), (1, b'b0'), (0, b'a1'), (2, b'c0'), (1, b'b1')]
+    sb = StreamScoreboard(expected, key=lambda f: f.tid)
+    for frame in [Frame(b'c0', 2), Frame(b'b0', 1), Frame(b'b1', 1), Frame(b'a0', 0), Frame(b'a1', 0)]:
+        assert sb.compare(frame)
+    sb.check(complete=True)
+    assert 5 == sb.summary()['matched']
+
+
+def test_window_limits_lookahead():
+    expected = [(0, b'a')] * 4 + [(1, b'b')]
+    sb = StreamScoreboard(iter(expected), window=2, key=lambda f: f.tid)
+    # only window expectations are looked ahead, key 1 is beyond them
+    assert not sb.compare(Frame(b'b', 1))
+    assert 1 == sb.summary()['unexpected']
+    assert 2 == sb.summary()['outstanding']
+    for i in range(4):
+        assert sb.compare(Frame(b'a', 0))
+    assert sb.compare(Frame(b'b', 1))
+    assert 0 == sb.summary()['outstanding']
+
+
+def test_mismatch_and_unexpected():
+    sb = StreamScoreboard([(0, b'abcd')], key=lambda f: f.tid)
+    assert not sb.compare(Frame(b'abXd', 0))
+    assert not sb.compare(Frame(b'zz', 3))
+    summary = sb.summary()
+    assert 1 == summary['mismatched']
+    assert 1 == summary['unexpected']
+    assert 2 == summary['mismatches'][0]['offset']
+    assert not sb.passed
+    with pytest.raises(Exception, match='1 mismatched, 1 unexpected'):
+        sb.check()
+
+
+def test_outstanding_fails_complete():
+    sb = StreamScoreboard([b'a', b'b'])
+    assert sb.compare(b'a')
+    sb.check()
+    with pytest.raises(Exception, match='1 outstanding'):
+        sb.check(complete=True)
@@ -0,0 +1,82 @@
+import pytest
+import cocotbext.daxzio.syncdriver as syncdriver
+from cocotbext.daxzio.syncdriver import syncDriver, _PS
+
+
+class Sig:
+    value = 0
+
+
+@pytest.fixture
+def timebase(monkeypatch):
+    # one sim step is 10 ps
+    monkeypatch.setattr(syncdriver, 'start_soon', lambda coro: coro.close())
+    monkeypatch.setattr(syncdriver, 'get_sim_steps', lambda t, units, round_mode=None: int(round(t*_PS[units]/10)))
+    monkeypatch.setattr(syncdriver, 'get_time_from_sim_steps', lambda steps, units: steps*10/_PS[units])
+
+
+def _driver(compression):
+    # 1 MHz frames of 1000 ns, vsync for 100 ns then two 50 ns pulses 200 ns apart
+    drv = syncDriver(vsync=Sig(), rsync=Sig(), vsync_freq=1000000, vsync_width=100, channel_delay=100, pulse_width=50, pulse_gap=200, compression=compression)
+    drv.t_start = 0
+    return drv
+
+
+def test_compression_map(timebase):
+    drv = _driver(4)
+    assert [0, 100000, 200000, 250000, 450000, 500000, 1000000] == drv.nominal
+    # high stretches keep their length, low ones are a quarter
+    assert [0, 100000, 125000, 175000, 225000, 275000, 400000] == drv.compressed
+    assert 40000 == drv.frame_steps
+
+
+@pytest.mark.parametrize('nominal', [0, 50000, 100000, 160000, 225000, 300000, 480000, 900000])
+def test_nominal_round_trip(timebase, nominal):
+    drv = _driver(4)
+    i = max(i for i, n in enumerate(drv.nominal) if n <= nominal)
+    scale = (drv.compressed[i+1] - drv.compressed[i])/(drv.nominal[i+1] - drv.nominal[i])
+    compressed = drv.compressed[i] + (nominal - drv.nominal[i])*scale
+    # one frame later in sim time is one nominal frame later
+    assert (0, pytest.approx(nominal)) == drv.frame_position(compressed, 'ps')
+    assert (1, pytest.approx(nominal)) == drv.frame_position(400000 + compressed, 'ps')
+    assert pytest.approx(1000000 + nominal) == drv.nominal_time(400000 + compressed, 'ps')
+    assert pytest.approx(1000 + nominal/1000) == drv.nominal_time((400000 + compressed)/1000, 'ns')
+
+
+def test_step_units(timebase):
+    drv = _driver(4)
+    # 15000 steps into the second frame is 225000 ps nominal, 22500 steps
+    assert (1, pytest.approx(22500)) == drv.frame_position(40000 + 15000, 'step')
+    assert pytest.approx(100000 + 22500) == drv.nominal_time(40000 + 15000, 'step')
+
+
+def test_uncompressed_is_identity(timebase):
+    drv = _driver(1)
+    assert drv.nominal == drv.compressed
+    assert (2, pytest.approx(333)) == drv.frame_position(2333, 'ns')
+
+
+def test_schedule(timebase):
+    drv = _driver(1)
+    v, r = drv.vsync, drv.rgbsync[0]
+    assert [(0, [(v, 1)]), (10000, [(v, 0)]), (10000, [(r, 1)]), (5000, [(r, 0)]), (20000, [(r, 1)]), (5000, [(r, 0)])] == drv.schedule
+    assert 100000 == drv.frame_steps
+    assert 50000 == drv.tail_steps
+    assert drv.frame_steps == sum(d for d, c in drv.schedule) + drv.tail_steps
+
+
+def test_schedule_groups_simultaneous(timebase):
+    a, b = Sig(), Sig()
+    drv = syncDriver(channels=[a, b], vsync_freq=1000000, vsync_width=100, channel_delay=100, channel_spacing=0, pulse_width=50, pulse_gap=200, pulses=1)
+    assert [(20000, [(a, 1), (b, 1)]), (5000, [(a, 0), (b, 0)])] == drv.schedule
+
+
+def test_compressed_schedule(timebase):
+    drv = _driver(4)
+    assert [0, 10000, 2500, 5000, 5000, 5000] == [d for d, c in drv.schedule]
+    assert 12500 == drv.tail_steps
+
+
+def test_schedule_must_fit(timebase):
+    with pytest.raises(Exception, match="doesn't fit in a frame"):
+        syncDriver(rsync=Sig(), vsync_freq=1000000, vsync_width=100, channel_delay=700, pulse_width=50, pulse_gap=200)
@@ -0,0 +1,31 @@
+from cocotbext.daxzio.trace import READ, WRITE, TraceRecorder, TraceReader
+
+
+def test_round_trip(tmp_path):
+    path = tmp_path / 'bus.trace'
+    now = iter(range(0, 1000, 10))
+    # a small buffer forces spills, and the last record bypasses it
+    with TraceRecorder(path, buffer_size=64, clock=lambda: next(now)) as recorder:
+        recorder.record(WRITE, 0x1000, 0x12345678, 4, txid=3)
+        recorder.record(READ, 0x1004, b'\xaa\xbb', resp=2)
+        recorder.record(WRITE, data=None)
+        for i in range(20):
+            recorder.record(READ, 0x2000 + 4*i, i, 4)
+        recorder.record(WRITE, 0xffff_ffff_0000, bytes(range(200)))
+    assert 24 == recorder.count
+
+    with TraceReader(path) as reader:
+        records = [(r.time, r.direction, r.addr, r.length, bytes(r.data), r.resp, r.id) for r in reader]
+    assert 24 == len(records)
+    assert (0, WRITE, 0x1000, 4, b'\x78\x56\x34\x12', 0, 3) == records[0]
+    assert (10, READ, 0x1004, 2, b'\xaa\xbb', 2, 0) == records[1]
+    assert (20, WRITE, 0, 0, b'', 0, 0) == records[2]
+    assert [i.to_bytes(4, 'little') for i in range(20)] == [r[4] for r in records[3:23]]
+    assert (230, WRITE, 0xffff_ffff_0000, 200, bytes(range(200)), 0, 0) == records[23]
+
+
+def test_empty(tmp_path):
+    path = tmp_path / 'bus.trace'
+    TraceRecorder(path, clock=lambda: 0).close()
+    with TraceReader(path) as reader:
+        assert [] == list(reader)